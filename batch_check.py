@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import fnmatch
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+from xml.etree import ElementTree as ET
+
+import dbc_cache
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = ".batch_check_state.json"
+# Меняется вместе с логикой сверки — старое состояние тогда не переиспользуется
+STATE_VERSION = 1
+ROUTE_PATTERN = "*rout*.xlsx"
+
+CATEGORIES = [
+    "id_mismatches",
+    "attribute_mismatches",
+    "route_diff",
+    "messages_only_excel",
+    "messages_only_dbc",
+    "signals_only_excel",
+    "signals_only_dbc",
+]
+
+
+class Job(NamedTuple):
+    name: str
+    matrix: str
+    dbc: str
+    route: Optional[str]
+
+
+def _is_route(filename: str, pattern: str) -> bool:
+    return fnmatch.fnmatch(filename.lower(), pattern.lower())
+
+
+def discover(root: str, route: Optional[str] = None, route_pattern: str = ROUTE_PATTERN) -> List[Job]:
+    """Пары matrix.xlsx + matrix.dbc с одинаковым именем в одном каталоге.
+
+    RoutingMAP берётся из route, иначе ищется по route_pattern в каталоге
+    матрицы и выше до root (ближайший, при нескольких — последний по имени).
+    """
+    root = os.path.abspath(root)
+    routes = {}
+    pairs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+        found = sorted(name for name in filenames if _is_route(name, route_pattern))
+        if found:
+            routes[dirpath] = os.path.join(dirpath, found[-1])
+        dbcs = {os.path.splitext(name)[0]: name for name in filenames if name.lower().endswith(".dbc")}
+        for name in sorted(filenames):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() != ".xlsx" or name.startswith("~$") or name in found or stem not in dbcs:
+                continue
+            pairs.append((dirpath, os.path.join(dirpath, name), os.path.join(dirpath, dbcs[stem])))
+
+    jobs = []
+    for dirpath, matrix, dbc in pairs:
+        route_path = os.path.abspath(route) if route else None
+        directory = dirpath
+        while route_path is None:
+            route_path = routes.get(directory)
+            if directory == root:
+                break
+            directory = os.path.dirname(directory)
+        name = os.path.relpath(os.path.splitext(matrix)[0], root).replace(os.sep, "/")
+        jobs.append(Job(name, matrix, dbc, route_path))
+    return jobs
+
+
+class HashState:
+    """Хэши файлов между запусками; (size, mtime) позволяет не перечитывать неизменённые файлы."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files = {}
+        self.jobs = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == STATE_VERSION:
+                    self.files = data.get("files", {})
+                    self.jobs = data.get("jobs", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable state {path}: {e}")
+
+    def file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        entry = self.files.get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        with open(path, "rb") as f:
+            digest = dbc_cache.content_hash(f.read())
+        self.files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def job_key(self, job: Job) -> str:
+        parts = [self.file_hash(job.matrix), self.file_hash(job.dbc)]
+        parts.append(self.file_hash(job.route) if job.route else "")
+        return dbc_cache.content_hash("|".join(parts).encode())
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "files": self.files, "jobs": self.jobs}, f)
+        os.replace(tmp_path, self.path)
+
+
+def check_job(job: Job) -> Dict:
+    """Сверка одной матрицы в процессе-воркере; возвращает JSON-совместимый словарь."""
+    import check_engine
+    import matrix_loader
+
+    start = time.perf_counter()
+    report = {"job": job.name, "matrix": job.matrix, "dbc": job.dbc, "route": job.route}
+    try:
+        if job.route is None:
+            raise FileNotFoundError("routing map not found")
+        dfx = matrix_loader.read_matrix(job.matrix)
+        dfdbc = dbc_cache.load_file(job.dbc)
+        dfRM = matrix_loader.read_matrix(job.route)
+        result = check_engine.run_check(dfx, dfdbc, dfRM).to_dict()
+        report["counts"] = {category: len(result[category]) for category in CATEGORIES}
+        report["result"] = result
+        report["error"] = None
+    except Exception as e:
+        report["counts"] = {}
+        report["result"] = None
+        report["error"] = f"{type(e).__name__}: {e}"
+    report["duration"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def is_failure(report: Dict, ignore: List[str]) -> bool:
+    return any(count for category, count in report["counts"].items() if category not in ignore)
+
+
+def run(
+    jobs: List[Job],
+    state: HashState,
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> List[Dict]:
+    """Проверяет изменившиеся задания в пуле процессов, остальные берёт из состояния."""
+    reports = {}
+    todo = []
+    for job in jobs:
+        try:
+            key = state.job_key(job)
+        except OSError as e:
+            reports[job.name] = {
+                "job": job.name, "matrix": job.matrix, "dbc": job.dbc, "route": job.route,
+                "counts": {}, "result": None, "error": f"{type(e).__name__}: {e}", "duration": 0.0, "cached": False,
+            }
+            continue
+        cached = state.jobs.get(job.name)
+        if not force and cached and cached["key"] == key:
+            reports[job.name] = dict(cached["report"], cached=True)
+        else:
+            todo.append((job, key))
+
+    if todo:
+        logger.info(f"Checking {len(todo)} of {len(jobs)} jobs")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (job, key), report in zip(todo, pool.map(check_job, [job for job, _ in todo])):
+                if report["error"] is None:
+                    state.jobs[job.name] = {"key": key, "report": report}
+                else:
+                    state.jobs.pop(job.name, None)
+                reports[job.name] = dict(report, cached=False)
+
+    names = {job.name for job in jobs}
+    for name in list(state.jobs):
+        if name not in names:
+            del state.jobs[name]
+    return [reports[job.name] for job in jobs]
+
+
+def _failure_text(report: Dict, limit: int = 50) -> str:
+    lines = []
+    for category in CATEGORIES:
+        items = report["result"][category]
+        if not items:
+            continue
+        lines.append(f"{category}: {len(items)}")
+        for item in items[:limit]:
+            lines.append(f"  {json.dumps(item, ensure_ascii=False, default=str)}")
+        if len(items) > limit:
+            lines.append(f"  ... {len(items) - limit} more")
+    return "\n".join(lines)
+
+
+def write_junit(reports: List[Dict], path: str, ignore: List[str]):
+    failures = sum(1 for report in reports if report["error"] is None and is_failure(report, ignore))
+    errors = sum(1 for report in reports if report["error"] is not None)
+    suite = ET.Element(
+        "testsuite",
+        name="canchecker",
+        tests=str(len(reports)),
+        failures=str(failures),
+        errors=str(errors),
+        time=f"{sum(report['duration'] for report in reports if not report['cached']):.3f}",
+    )
+    for report in reports:
+        classname, _, name = report["job"].rpartition("/")
+        case = ET.SubElement(
+            suite, "testcase", classname=classname.replace("/", ".") or "canchecker", name=name, time=f"{report['duration']:.3f}"
+        )
+        if report["error"] is not None:
+            ET.SubElement(case, "error", message=report["error"])
+        elif is_failure(report, ignore):
+            counts = ", ".join(f"{category}={count}" for category, count in report["counts"].items() if count)
+            failure = ET.SubElement(case, "failure", message=counts)
+            failure.text = _failure_text(report)
+        if report["cached"]:
+            ET.SubElement(case, "system-out").text = "unchanged since previous run, result reused"
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная сверка Excel-матриц, DBC и RoutingMAP для CI")
+    parser.add_argument("root", help="каталог с версиями матриц (xlsx + dbc с одинаковым именем)")
+    parser.add_argument("--route", help="RoutingMAP для всех матриц вместо поиска по --route-pattern")
+    parser.add_argument("--route-pattern", default=ROUTE_PATTERN)
+    parser.add_argument("--state", help=f"файл состояния (по умолчанию root/{STATE_FILE})")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="проверить всё, игнорируя состояние")
+    parser.add_argument("--json", dest="json_path")
+    parser.add_argument("--junit")
+    parser.add_argument("--ignore", nargs="*", default=[], choices=CATEGORIES, help="категории, не считающиеся ошибкой")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    start = time.perf_counter()
+    jobs = discover(args.root, args.route, args.route_pattern)
+    state = HashState(args.state or os.path.join(args.root, STATE_FILE))
+    reports = run(jobs, state, args.workers, args.force)
+    state.save()
+
+    failed = [report for report in reports if report["error"] is None and is_failure(report, args.ignore)]
+    errors = [report for report in reports if report["error"] is not None]
+    for report in reports:
+        if report["error"] is not None:
+            status = f"ERROR {report['error']}"
+        elif report in failed:
+            status = "FAIL " + ", ".join(f"{category}={count}" for category, count in report["counts"].items() if count)
+        else:
+            status = "ok"
+        logger.info(f"{report['job']}: {status}{' (cached)' if report['cached'] else ''}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"jobs": reports, "failed": len(failed), "errors": len(errors)}, f, ensure_ascii=False, indent=2, default=str)
+    if args.junit:
+        write_junit(reports, args.junit, args.ignore)
+
+    checked = sum(1 for report in reports if not report["cached"])
+    logger.info(
+        f"{len(reports)} jobs, {checked} checked, {len(reports) - checked} cached, "
+        f"{len(failed)} failed, {len(errors)} errors in {time.perf_counter() - start:.1f} s"
+    )
+    sys.exit(1 if failed or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Сравнение последовательной и параллельной загрузки DBC в test_libs.read_dbc.
+
+Пример:
+    python benchmarks/bench_read_dbc.py path/to/*.dbc --workers 4 --repeat 3
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dbc_cache
+import test_libs as tl
+
+
+def run(paths, parallel: bool, workers: int = None) -> float:
+    # Кэш отключён, иначе второй прогон измерял бы только поиск по хэшу
+    dbc_cache.default_cache.clear()
+    start = time.perf_counter()
+    result = tl.read_dbc(paths, parallel=parallel, workers=workers)
+    elapsed = time.perf_counter() - start
+    if len(result) != len(paths):
+        print(f"Loaded {len(result)} of {len(paths)} files")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    dbc_cache.default_cache.cache_dir = None
+
+    sequential = min(run(args.paths, parallel=False) for _ in range(args.repeat))
+    parallel = min(run(args.paths, parallel=True, workers=args.workers) for _ in range(args.repeat))
+
+    print(f"files:      {len(args.paths)}")
+    print(f"sequential: {sequential:.3f} s")
+    print(f"parallel:   {parallel:.3f} s (workers={args.workers or os.cpu_count()})")
+    print(f"speedup:    {sequential / parallel:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Замеры основных этапов CANChecker на синтетических данных и контроль регрессий.
+
+Данные генерируются benchmarks/synthetic.py (или берутся готовые из --data),
+результаты дописываются в history.jsonl и сравниваются с прошлым прогоном
+того же масштаба.
+
+Пример:
+    python benchmarks/run_benchmarks.py --messages 10000 --signals 20 --fail-on-regression
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import dbc_cache
+import catalog
+import main as checker
+import matrix_loader
+import test_libs as tl
+import synthetic
+
+HISTORY_FILE = os.path.join(BENCH_DIR, "history.jsonl")
+
+
+def timed(func: Callable, repeat: int = 1, setup: Optional[Callable] = None):
+    """Лучшее время из repeat прогонов и результат последнего."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _reset_dbc_cache():
+    dbc_cache.default_cache.clear()
+    shutil.rmtree(dbc_cache.default_cache.cache_dir, ignore_errors=True)
+
+
+def _reset_matrix_cache():
+    shutil.rmtree(matrix_loader.CACHE_DIR, ignore_errors=True)
+
+
+def run_suite(manifest: Dict, repeat: int = 3, eager_graph: bool = False) -> Dict[str, float]:
+    """Замеры в секундах; кэши на диске относительны текущего каталога."""
+    timings = {}
+    dbc_paths = manifest["dbc"]
+
+    timings["read_dbc_cold"], _ = timed(lambda: tl.read_dbc(dbc_paths), repeat, _reset_dbc_cache)
+    timings["read_dbc_warm"], df_dbc = timed(lambda: tl.read_dbc(dbc_paths), repeat)
+    db = tl.read_dbc(dbc_paths[0])
+
+    if manifest.get("matrix"):
+        timings["read_files_cold"], _ = timed(
+            lambda: checker.read_files(manifest["matrix"]), repeat, _reset_matrix_cache
+        )
+        timings["read_files_warm"], dfx = timed(lambda: checker.read_files(manifest["matrix"]), repeat)
+        dfRM = checker.read_files(manifest["route"])
+        timings["checkSignalsMessages"], result = timed(
+            lambda: checker.checkSignalsMessages(dfx, db, dfRM, log=False), repeat
+        )
+        _verify(result, manifest.get("expected"))
+
+    timings["getSignalsDetailed"], _ = timed(lambda: tl.getSignalsDetailed(df_dbc), repeat)
+    timings["catalog"], _ = timed(lambda: catalog.Catalog(df_dbc), repeat)
+    cat = catalog.catalog_for(df_dbc)
+    timings["statistics_tables"], _ = timed(
+        lambda: [(cat.messages_table(name), cat.signals_table(name)) for name in cat.files], repeat
+    )
+
+    timings["createGraph_lazy"], _ = timed(lambda: checker.createGraph(db, lazy=True), repeat)
+    if eager_graph:
+        timings["createGraph"], _ = timed(lambda: checker.createGraph(db), 1)
+    return timings
+
+
+def _verify(result, expected: Optional[Dict]):
+    """Проверка, что внедрённые расхождения найдены — иначе замер бессмыслен."""
+    if not expected:
+        return
+    found = sorted(result.id_mismatches["message"]) if len(result.id_mismatches) else []
+    problems = []
+    if sorted(result.messages_only_dbc) != expected["messages_only_dbc"]:
+        problems.append("messages_only_dbc")
+    if found != expected["id_mismatches"]:
+        problems.append("id_mismatches")
+    lengths = result.attribute_mismatches
+    lengths = sorted(lengths[lengths["field"] == "length"][["message", "signal"]].values.tolist())
+    if lengths != expected["length_mismatches"]:
+        problems.append("length_mismatches")
+    if problems:
+        print(f"WARNING: check result differs from injected mismatches: {', '.join(problems)}")
+
+
+def load_history(path: str = HISTORY_FILE) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(entry: Dict, path: str = HISTORY_FILE):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def compare(current: Dict, history: List[Dict], threshold: float = 0.2) -> List[Dict]:
+    """Этапы, ставшие медленнее прошлого прогона того же масштаба больше чем на threshold."""
+    previous = [entry for entry in history if entry["scale"] == current["scale"]]
+    if not previous:
+        return []
+    baseline = previous[-1]["timings"]
+    regressions = []
+    for stage, seconds in current["timings"].items():
+        before = baseline.get(stage)
+        if before and seconds > before * (1 + threshold):
+            regressions.append({"stage": stage, "before": before, "after": seconds, "ratio": seconds / before})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--signals", type=int, default=20)
+    parser.add_argument("--files", type=int, default=1)
+    parser.add_argument("--mismatch-rate", type=float, default=0.01)
+    parser.add_argument("--data", help="каталог с manifest.json от synthetic.py вместо генерации")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--eager-graph", action="store_true", help="замерять и полный createGraph (медленно)")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="canchecker_bench_")
+    cwd = os.getcwd()
+    try:
+        if args.data:
+            manifest = synthetic.load_manifest(args.data)
+        else:
+            start = time.perf_counter()
+            manifest = synthetic.generate(
+                os.path.join(workdir, "data"), args.messages, args.signals, args.files, args.mismatch_rate
+            )
+            print(f"generated data in {time.perf_counter() - start:.1f} s")
+
+        os.chdir(workdir)
+        timings = run_suite(manifest, args.repeat, args.eager_graph)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    entry = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "scale": os.path.abspath(args.data) if args.data else f"{args.messages}x{args.signals}x{args.files}",
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "timings": timings,
+    }
+    regressions = compare(entry, load_history(args.history), args.threshold)
+
+    width = max(len(stage) for stage in timings)
+    for stage, seconds in timings.items():
+        print(f"{stage:<{width}}  {seconds:9.3f} s")
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['stage']}: {regression['before']:.3f} s -> "
+            f"{regression['after']:.3f} s (x{regression['ratio']:.2f})"
+        )
+
+    if not args.no_save:
+        append_history(entry, args.history)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Генератор синтетических DBC и книг CAN Matrix / RouteTable заданного масштаба.
+
+Пример:
+    python benchmarks/synthetic.py out/ --messages 10000 --signals 20 --files 4
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import matrix_loader as ml
+
+FD_LENGTHS = [8, 12, 16, 20, 24, 32, 48, 64]
+CYCLE_TIMES = [10, 20, 50, 100, 200, 500, 1000]
+# Значения атрибута VFrameFormat в порядке Vector (индекс — значение в BA_)
+FRAME_FORMATS = ["StandardCAN", "ExtendedCAN"] + ["reserved"] * 12 + ["StandardCAN_FD", "ExtendedCAN_FD"]
+
+
+def _ecus(count: int) -> List[str]:
+    return [f"ECU{i:02d}" for i in range(count)]
+
+
+def generate_layout(
+    messages: int,
+    signals_per_message: int,
+    ecus: int = 12,
+    seed: int = 0,
+    fd: bool = True,
+) -> List[Dict]:
+    """Описание сообщений и сигналов без наложений, годное и для DBC, и для Excel."""
+    rng = random.Random(seed)
+    ecu_names = _ecus(ecus)
+    layout = []
+    for m in range(messages):
+        extended = m >= 0x700
+        frame_id = (0x18000000 + m) if extended else (0x10 + m)
+        length = rng.choice(FD_LENGTHS) if fd else 8
+        sender = rng.choice(ecu_names)
+        receivers = rng.sample([ecu for ecu in ecu_names if ecu != sender], k=min(3, ecus - 1))
+
+        signals = []
+        bit = 0
+        for s in range(signals_per_message):
+            size = rng.choice([1, 2, 4, 8, 12, 16])
+            if bit + size > length * 8:
+                break
+            signals.append({
+                "name": f"Sig_{m}_{s}",
+                "start": bit,
+                "length": size,
+                "byte_order": "little_endian",
+                "is_signed": size >= 8 and rng.random() < 0.2,
+                "scale": rng.choice([1, 0.1, 0.5, 0.01]),
+                "offset": rng.choice([0, 0, -40]),
+                "minimum": 0,
+                "maximum": 2 ** size - 1,
+                "unit": rng.choice(["", "km/h", "degC", "V"]),
+                "receivers": receivers,
+            })
+            bit += size
+        layout.append({
+            "name": f"Msg_{m}",
+            "frame_id": frame_id,
+            "extended": extended,
+            "length": length,
+            "sender": sender,
+            "cycle_time": rng.choice(CYCLE_TIMES),
+            "signals": signals,
+        })
+    return layout
+
+
+def write_dbc(layout: List[Dict], path: str, ecus: int = 12):
+    """Запись DBC напрямую текстом — dump_file слишком медленный на 200k сигналов."""
+    with open(path, "w", encoding="cp1252") as f:
+        f.write('VERSION ""\n\nNS_ :\n\nBS_:\n\n')
+        f.write("BU_: " + " ".join(_ecus(ecus)) + "\n\n")
+        for message in layout:
+            frame_id = message["frame_id"] | (0x80000000 if message["extended"] else 0)
+            f.write(f"BO_ {frame_id} {message['name']}: {message['length']} {message['sender']}\n")
+            for signal in message["signals"]:
+                sign = "-" if signal["is_signed"] else "+"
+                f.write(
+                    f" SG_ {signal['name']} : {signal['start']}|{signal['length']}@1{sign}"
+                    f" ({signal['scale']},{signal['offset']}) [{signal['minimum']}|{signal['maximum']}]"
+                    f" \"{signal['unit']}\" {','.join(signal['receivers'])}\n"
+                )
+            f.write("\n")
+        f.write('BA_DEF_ BO_ "GenMsgCycleTime" INT 0 65535;\n')
+        f.write('BA_DEF_ BO_ "VFrameFormat" ENUM ' + ",".join(f'"{name}"' for name in FRAME_FORMATS) + ";\n")
+        f.write('BA_DEF_DEF_ "GenMsgCycleTime" 0;\n')
+        f.write('BA_DEF_DEF_ "VFrameFormat" "StandardCAN";\n')
+        for message in layout:
+            frame_id = message["frame_id"] | (0x80000000 if message["extended"] else 0)
+            f.write(f'BA_ "GenMsgCycleTime" BO_ {frame_id} {message["cycle_time"]};\n')
+            # Без VFrameFormat cantools читает сообщения длиннее 8 байт как классический CAN
+            if message["length"] > 8:
+                frame_format = FRAME_FORMATS.index("ExtendedCAN_FD" if message["extended"] else "StandardCAN_FD")
+                f.write(f'BA_ "VFrameFormat" BO_ {frame_id} {frame_format};\n')
+
+
+def write_matrix(layout: List[Dict], path: str):
+    columns = ml.SIGNAL_ATTRIBUTE_COLUMNS
+    rows = []
+    for message in layout:
+        for signal in message["signals"]:
+            rows.append({
+                ml.MSG_NAME_COL: message["name"],
+                ml.SIGNAL_NAME_COL: signal["name"],
+                columns["start_bit"]: signal["start"],
+                columns["length"]: signal["length"],
+                columns["scale"]: signal["scale"],
+                columns["offset"]: signal["offset"],
+                columns["unit"]: signal["unit"],
+                columns["is_signed"]: "Signed" if signal["is_signed"] else "Unsigned",
+                columns["recievers"]: ",".join(signal["receivers"]),
+                columns["byte order"]: "Intel",
+                columns["max"]: signal["maximum"],
+                columns["min"]: signal["minimum"],
+                columns["init"]: "0x0",
+            })
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame(rows).to_excel(writer, sheet_name=ml.MATRIX_SHEET, index=False)
+
+
+def write_route_table(layout: List[Dict], path: str):
+    rows = [["", "Message Name", "ID"]]
+    for i, message in enumerate(layout):
+        rows.append([i + 1, message["name"], f"0x{message['frame_id']:X}"])
+    df = pd.DataFrame(rows, columns=["Routing", ml.ROUTE_NAME_COL, ml.ROUTE_ID_COL])
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, sheet_name=ml.ROUTE_SHEET, index=False)
+
+
+def inject_mismatches(layout: List[Dict], rate: float, seed: int = 1) -> Dict:
+    """Копия раскладки для Excel/RouteTable с контролируемыми расхождениями.
+
+    Возвращает {"excel": ..., "route": ..., "expected": {...}}.
+    """
+    rng = random.Random(seed)
+    count = max(1, int(len(layout) * rate))
+    excel = [dict(message, signals=[dict(signal) for signal in message["signals"]]) for message in layout]
+    route = [dict(message) for message in layout]
+
+    dropped = rng.sample(range(len(excel)), count)
+    dropped_names = sorted(excel[i]["name"] for i in dropped)
+    for i in sorted(dropped, reverse=True):
+        del excel[i]
+
+    length_changes = []
+    for message in rng.sample(excel, min(count, len(excel))):
+        if message["signals"]:
+            signal = message["signals"][0]
+            signal["length"] += 1
+            length_changes.append([message["name"], signal["name"]])
+
+    id_changes = []
+    for message in rng.sample(route, count):
+        if message["extended"]:
+            message["frame_id"] += 0x100000
+        else:
+            message["frame_id"] ^= 0x400
+        id_changes.append(message["name"])
+
+    return {
+        "excel": excel,
+        "route": route,
+        "expected": {
+            "messages_only_dbc": dropped_names,
+            "length_mismatches": sorted(length_changes),
+            "id_mismatches": sorted(id_changes),
+        },
+    }
+
+
+def generate(
+    out_dir: str,
+    messages: int = 10000,
+    signals_per_message: int = 20,
+    files: int = 1,
+    mismatch_rate: float = 0.01,
+    seed: int = 0,
+    excel: bool = True,
+) -> Dict:
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"dbc": [], "matrix": None, "route": None, "expected": None}
+    per_file = max(1, messages // files)
+    layouts = []
+    for i in range(files):
+        layout = generate_layout(per_file, signals_per_message, seed=seed + i)
+        name = f"synthetic_{i}.dbc"
+        write_dbc(layout, os.path.join(out_dir, name))
+        manifest["dbc"].append(name)
+        layouts.append(layout)
+
+    if excel:
+        injected = inject_mismatches(layouts[0], mismatch_rate, seed=seed + 1000)
+        manifest["matrix"] = "synthetic_matrix.xlsx"
+        manifest["route"] = "synthetic_route.xlsx"
+        write_matrix(injected["excel"], os.path.join(out_dir, manifest["matrix"]))
+        write_route_table(injected["route"], os.path.join(out_dir, manifest["route"]))
+        manifest["expected"] = injected["expected"]
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return load_manifest(out_dir)
+
+
+def load_manifest(out_dir: str) -> Dict:
+    """manifest.json с путями, приведёнными к абсолютным."""
+    with open(os.path.join(out_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    out_dir = os.path.abspath(out_dir)
+    manifest["dbc"] = [os.path.join(out_dir, name) for name in manifest["dbc"]]
+    for key in ("matrix", "route"):
+        if manifest[key]:
+            manifest[key] = os.path.join(out_dir, manifest[key])
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("out_dir")
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--signals", type=int, default=20)
+    parser.add_argument("--files", type=int, default=1)
+    parser.add_argument("--mismatch-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-excel", action="store_true")
+    args = parser.parse_args()
+    manifest = generate(
+        args.out_dir, args.messages, args.signals, args.files, args.mismatch_rate, args.seed, not args.no_excel
+    )
+    print(json.dumps({key: value for key, value in manifest.items() if key != "expected"}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
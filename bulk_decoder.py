@@ -0,0 +1,241 @@
+import os
+import argparse
+from typing import Dict, Iterable, Union
+
+import can
+import cantools
+import cantools.database
+import numpy as np
+import pandas as pd
+
+import test_libs as tl
+from frame_ids import EXTENDED_FLAG, frame_key
+
+MAX_PAYLOAD = 64
+CHUNK_SIZE = 100_000
+
+
+class SignalLayout:
+    """Предвычисленные параметры извлечения одного сигнала из массива payload."""
+
+    def __init__(self, signal):
+        self.name = signal.name
+        self.length = signal.length
+        self.is_signed = signal.is_signed
+        self.is_float = signal.is_float
+        self.scale = signal.scale
+        self.offset = signal.offset
+        self.multiplexer_ids = signal.multiplexer_ids
+        self.multiplexer_signal = signal.multiplexer_signal
+        if signal.byte_order == "big_endian":
+            # MSB в DBC-нумерации -> нумерация "вперёд" (np.unpackbits bitorder="big")
+            lo = (signal.start // 8) * 8 + (7 - signal.start % 8)
+            self.bitorder = "big"
+            self.weights = np.left_shift(np.uint64(1), np.arange(self.length - 1, -1, -1, dtype=np.uint64))
+        else:
+            lo = signal.start
+            self.bitorder = "little"
+            self.weights = np.left_shift(np.uint64(1), np.arange(self.length, dtype=np.uint64))
+        self.first_byte = lo // 8
+        self.last_byte = (lo + self.length - 1) // 8
+        self.bit_offset = lo - self.first_byte * 8
+
+    def raw(self, payloads: np.ndarray) -> np.ndarray:
+        bits = np.unpackbits(payloads[:, self.first_byte:self.last_byte + 1], axis=1, bitorder=self.bitorder)
+        field = bits[:, self.bit_offset:self.bit_offset + self.length].astype(np.uint64)
+        return (field * self.weights).sum(axis=1, dtype=np.uint64)
+
+    def physical(self, raw: np.ndarray) -> np.ndarray:
+        if self.is_float:
+            values = raw.astype(np.uint32).view(np.float32) if self.length == 32 else raw.view(np.float64)
+            values = values.astype(np.float64)
+        elif self.is_signed:
+            values = raw.view(np.int64)
+            if self.length < 64:
+                sign = np.int64(1) << np.int64(self.length - 1)
+                values = (values ^ sign) - sign
+            values = values.astype(np.float64)
+        else:
+            values = raw.astype(np.float64)
+        return values * self.scale + self.offset
+
+
+class MessageLayout:
+    def __init__(self, message):
+        self.name = message.name
+        self.frame_id = message.frame_id
+        self.key = frame_key(message.frame_id, message.is_extended_frame)
+        # Имя выходного файла; build_layouts уточняет его при совпадении имён в разных DBC
+        self.file_name = message.name
+        self.signals = [SignalLayout(signal) for signal in message.signals]
+        self.by_name = {layout.name: layout for layout in self.signals}
+
+    def decode(self, payloads: np.ndarray, lengths: np.ndarray) -> Dict[str, np.ndarray]:
+        columns = {}
+        raws = {}
+        for layout in self.signals:
+            raw = layout.raw(payloads)
+            raws[layout.name] = raw
+            values = layout.physical(raw)
+            # Укороченные кадры: сигнал, не поместившийся в DLC, не определён
+            values[lengths <= layout.last_byte] = np.nan
+            columns[layout.name] = values
+        for layout in self.signals:
+            if layout.multiplexer_signal and layout.multiplexer_ids:
+                selector = raws.get(layout.multiplexer_signal)
+                if selector is not None:
+                    active = np.isin(selector, np.array(layout.multiplexer_ids, dtype=np.uint64))
+                    columns[layout.name][~active] = np.nan
+        return columns
+
+
+def build_layouts(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> Dict[int, MessageLayout]:
+    df_dbc = tl.as_dbc_dict(df_dbc, full=True)
+    layouts = {}
+    for db in df_dbc.values():
+        for message in db.messages:
+            layouts.setdefault(frame_key(message.frame_id, message.is_extended_frame), MessageLayout(message))
+    names = {}
+    for layout in layouts.values():
+        names[layout.name] = names.get(layout.name, 0) + 1
+    for layout in layouts.values():
+        if names[layout.name] > 1:
+            suffix = "x" if layout.key & EXTENDED_FLAG else ""
+            layout.file_name = f"{layout.name}_0x{layout.frame_id:X}{suffix}"
+    return layouts
+
+
+def read_chunks(frames: Iterable[can.Message], chunk_size: int = CHUNK_SIZE):
+    """Группировка потока кадров в массивы: timestamps, keys, lengths, payloads (n, 64)."""
+    timestamps = np.empty(chunk_size, dtype=np.float64)
+    keys = np.empty(chunk_size, dtype=np.int64)
+    lengths = np.empty(chunk_size, dtype=np.int16)
+    payloads = np.zeros((chunk_size, MAX_PAYLOAD), dtype=np.uint8)
+    n = 0
+    for frame in frames:
+        if frame.is_error_frame or frame.is_remote_frame:
+            continue
+        data = frame.data
+        size = min(len(data), MAX_PAYLOAD)
+        timestamps[n] = frame.timestamp
+        keys[n] = frame.arbitration_id | EXTENDED_FLAG if frame.is_extended_id else frame.arbitration_id
+        lengths[n] = size
+        payloads[n, :size] = np.frombuffer(bytes(data[:size]), dtype=np.uint8)
+        n += 1
+        if n == chunk_size:
+            yield timestamps, keys, lengths, payloads
+            timestamps = np.empty(chunk_size, dtype=np.float64)
+            keys = np.empty(chunk_size, dtype=np.int64)
+            lengths = np.empty(chunk_size, dtype=np.int16)
+            payloads = np.zeros((chunk_size, MAX_PAYLOAD), dtype=np.uint8)
+            n = 0
+    if n:
+        yield timestamps[:n], keys[:n], lengths[:n], payloads[:n]
+
+
+def decode_chunk(layouts: Dict[int, MessageLayout], timestamps, keys, lengths, payloads) -> Dict[int, pd.DataFrame]:
+    """Векторное декодирование одного блока: {frame key: DataFrame(timestamp, сигналы...)}.
+
+    Ключ — frame key, а не имя: в разных DBC одно имя может быть у сообщений
+    с разными ID и разным набором сигналов.
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    unique_keys, starts = np.unique(sorted_keys, return_index=True)
+    ends = np.append(starts[1:], len(sorted_keys))
+
+    result = {}
+    for key, begin, end in zip(unique_keys, starts, ends):
+        layout = layouts.get(int(key))
+        if layout is None:
+            continue
+        rows = order[begin:end]
+        columns = {"timestamp": timestamps[rows]}
+        columns.update(layout.decode(payloads[rows], lengths[rows]))
+        result[layout.key] = pd.DataFrame(columns)
+    return result
+
+
+class ParquetSink:
+    """Запись по одному Parquet-файлу на сообщение.
+
+    Блоки копятся в памяти и сбрасываются row group'ами, когда суммарно
+    накоплено больше max_buffered_rows строк, — так память ограничена, а
+    редкие сообщения не превращаются в тысячи крошечных row group.
+    """
+
+    def __init__(self, out_dir: str, max_buffered_rows: int = 1_000_000):
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.out_dir = out_dir
+        self.max_buffered_rows = max_buffered_rows
+        self.writers = {}
+        self._buffers = {}
+        self._buffered_rows = 0
+        os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, name: str, df: pd.DataFrame):
+        self._buffers.setdefault(name, []).append(df)
+        self._buffered_rows += len(df)
+        if self._buffered_rows >= self.max_buffered_rows:
+            self.flush()
+
+    def flush(self):
+        for name, frames in self._buffers.items():
+            table = self._pa.Table.from_pandas(pd.concat(frames, ignore_index=True), preserve_index=False)
+            writer = self.writers.get(name)
+            if writer is None:
+                path = os.path.join(self.out_dir, f"{name}.parquet")
+                writer = self._pq.ParquetWriter(path, table.schema)
+                self.writers[name] = writer
+            writer.write_table(table)
+        self._buffers = {}
+        self._buffered_rows = 0
+
+    def close(self):
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+def decode_log(
+    log_path: str,
+    df_dbc: Union[cantools.database.can.database.Database, Dict],
+    out_dir: str,
+    chunk_size: int = CHUNK_SIZE,
+) -> Dict:
+    """Декодирование candump/ASC/BLF-лога (через can.LogReader) в Parquet по сообщениям."""
+    layouts = build_layouts(df_dbc)
+    sink = ParquetSink(out_dir)
+    frames = 0
+    decoded = 0
+    messages = set()
+    try:
+        for timestamps, keys, lengths, payloads in read_chunks(can.LogReader(log_path), chunk_size):
+            frames += len(keys)
+            for key, df in decode_chunk(layouts, timestamps, keys, lengths, payloads).items():
+                decoded += len(df)
+                messages.add(key)
+                sink.write(layouts[key].file_name, df)
+    finally:
+        sink.close()
+    return {"frames": frames, "decoded": decoded, "unknown": frames - decoded, "messages": len(messages)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетное декодирование CAN-логов в Parquet")
+    parser.add_argument("log")
+    parser.add_argument("dbc", nargs="+")
+    parser.add_argument("--out", default="decoded")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print(decode_log(args.log, tl.read_dbc(args.dbc), args.out, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
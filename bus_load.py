@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional, Union
+
+import cantools
+import cantools.database
+import numpy as np
+import pandas as pd
+
+import catalog
+import test_libs as tl
+
+FD_LENGTHS = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64])
+
+DEFAULT_BITRATES = [
+    {"name": "500k/2M", "nominal": 500_000, "data": 2_000_000},
+]
+
+
+def frame_time(
+    length: np.ndarray,
+    is_extended: np.ndarray,
+    is_fd: np.ndarray,
+    nominal: np.ndarray,
+    data: np.ndarray,
+) -> np.ndarray:
+    """Время передачи кадра в секундах с наихудшим бит-стаффингом.
+
+    Все аргументы транслируются друг на друга (broadcast), так что можно
+    посчитать сразу матрицу сообщения x варианты битрейтов.
+    """
+    length = np.asarray(length)
+    is_extended = np.asarray(is_extended, dtype=bool)
+    is_fd = np.asarray(is_fd, dtype=bool)
+
+    # Classic CAN (Davis et al.): 8s + g + 13 + floor((g + 8s - 1) / 4), g = 34/54
+    g = np.where(is_extended, 54, 34)
+    classic_length = np.minimum(length, 8)
+    classic_bits = 8 * classic_length + g + 13 + (g + 8 * classic_length - 1) // 4
+    classic = classic_bits / nominal
+
+    # CAN-FD: арбитраж и хвост на номинальной скорости, данные — на скорости data
+    fd_length = FD_LENGTHS[np.searchsorted(FD_LENGTHS, np.minimum(length, 64))]
+    arbitration = np.where(is_extended, 36, 17)
+    arbitration = arbitration + (arbitration - 1) // 4
+    payload = 1 + 4 + 8 * fd_length
+    payload = payload + (payload - 1) // 4
+    crc = np.where(fd_length <= 16, 17, 21)
+    crc_field = 4 + crc + (4 + crc + 3) // 4
+    tail = 1 + 2 + 7 + 3
+    fd = (arbitration + tail) / nominal + (payload + crc_field) / data
+
+    return np.where(is_fd, fd, classic)
+
+
+def _bus_names(df_dbc: Dict) -> Dict[str, str]:
+    names = {}
+    for filename, db in df_dbc.items():
+        buses = db.buses
+        names[filename] = buses[0].name if buses else filename
+    return names
+
+
+def estimate(
+    df_dbc: Union[cantools.database.can.database.Database, Dict],
+    bitrates: Optional[List[Dict]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Теоретическая загрузка шин и ECU по всем сообщениям с cycle_time.
+
+    bitrates — список вариантов {"name", "nominal", "data"}; считаются все
+    сразу одной матричной операцией. Возвращает таблицы per_bus, per_ecu и
+    per_message (в процентах загрузки) и число пропущенных сообщений без
+    cycle_time (skipped). Шина — первая из db.buses (как в getBus), иначе имя файла.
+    """
+    df_dbc = tl.as_dbc_dict(df_dbc)
+    bitrates = bitrates or DEFAULT_BITRATES
+    options = [option["name"] for option in bitrates]
+    nominal = np.array([option["nominal"] for option in bitrates], dtype=float)
+    data = np.array([option.get("data", option["nominal"]) for option in bitrates], dtype=float)
+
+    messages = catalog.catalog_for(df_dbc).messages
+    periodic = messages[messages["cycle_time"].fillna(0) > 0]
+    bus = periodic["file"].astype(str).map(_bus_names(df_dbc))
+
+    times = frame_time(
+        periodic["length"].to_numpy()[:, None],
+        periodic["is_extended"].to_numpy()[:, None],
+        periodic["is_fd"].to_numpy()[:, None],
+        nominal[None, :],
+        data[None, :],
+    )
+    period = periodic["cycle_time"].to_numpy(dtype=float)[:, None] / 1000.0
+    load = pd.DataFrame(times / period * 100.0, columns=options, index=periodic.index)
+
+    per_message = pd.concat([
+        pd.DataFrame({"bus": bus, "message": periodic["message"], "cycle_time": periodic["cycle_time"]}),
+        load,
+    ], axis=1)
+
+    per_bus = load.groupby(bus.to_numpy()).sum()
+    per_bus.insert(0, "messages", bus.value_counts())
+    per_bus.index.name = "bus"
+
+    senders = periodic["senders"].map(lambda value: value or ["<unknown>"])
+    exploded = pd.DataFrame({"bus": bus, "ecu": senders}).explode("ecu")
+    ecu_load = load.loc[exploded.index].set_axis(exploded.index)
+    per_ecu = pd.concat([exploded, ecu_load], axis=1).groupby(["bus", "ecu"])[options].sum()
+
+    return {
+        "per_bus": per_bus.reset_index(),
+        "per_ecu": per_ecu.reset_index(),
+        "per_message": per_message.reset_index(drop=True),
+        "skipped": int(len(messages) - len(periodic)),
+    }
@@ -0,0 +1,142 @@
+from typing import Dict, Optional, Union
+
+import cantools
+import cantools.database
+import pandas as pd
+
+import dbc_cache
+import test_libs as tl
+
+_catalogs = dbc_cache.DerivedCache(max_entries=8)
+
+MESSAGE_DISPLAY = {"message": "Message", "id": "ID", "length": "Length", "signals_count": "Signals Count"}
+SIGNAL_DISPLAY = {"signal": "Signal", "message": "Message", "start_bit": "Start Bit", "length": "Length"}
+
+
+# Колонки и их типы; object — там, где cantools отдаёт None вперемешку с числами
+MESSAGE_COLUMNS = {
+    "file": "category",
+    "message": object,
+    "frame_id": "int64",
+    "id": object,
+    "length": "int16",
+    "signals_count": "int32",
+    "is_extended": "bool",
+    "is_fd": "bool",
+    "cycle_time": "Int64",
+    "send_type": object,
+    "senders": object,
+}
+SIGNAL_COLUMNS = {
+    "file": "category",
+    "message": object,
+    "signal": object,
+    "start_bit": "int32",
+    "length": "int32",
+    "scale": "float64",
+    "offset": "float64",
+    "unit": object,
+    "is_signed": "bool",
+    "recievers": object,
+    "byte order": "category",
+    "max": object,
+    "min": object,
+    "init": object,
+    "invalid": object,
+    "description": object,
+}
+
+
+def _frame(rows, columns: Dict) -> pd.DataFrame:
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return pd.DataFrame({
+        name: pd.Series(list(column), dtype=dtype)
+        for (name, dtype), column in zip(columns.items(), values)
+    })
+
+
+class Catalog:
+    """Плоский колоночный каталог сообщений и сигналов всех загруженных DBC.
+
+    Строки сгруппированы по файлам, поэтому выборка по файлу — срез iloc
+    по заранее известному диапазону, а не новый проход по объектам cantools.
+    """
+
+    def __init__(self, df_dbc: Union[cantools.database.can.database.Database, Dict]):
+        df_dbc = tl.as_dbc_dict(df_dbc)
+
+        message_rows = []
+        signal_rows = []
+        self.message_ranges = {}
+        self.signal_ranges = {}
+        for filename, db in df_dbc.items():
+            message_start = len(message_rows)
+            signal_start = len(signal_rows)
+            for message in db.messages:
+                message_rows.append((
+                    filename,
+                    message.name,
+                    message.frame_id,
+                    f"0x{message.frame_id:X}",
+                    message.length,
+                    len(message.signals),
+                    message.is_extended_frame,
+                    message.is_fd,
+                    message.cycle_time,
+                    message.send_type,
+                    message.senders,
+                ))
+                for signal in message.signals:
+                    signal_rows.append((
+                        filename,
+                        message.name,
+                        signal.name,
+                        signal.start,
+                        signal.length,
+                        signal.scale,
+                        signal.offset,
+                        signal.unit,
+                        signal.is_signed,
+                        signal.receivers,
+                        signal.byte_order,
+                        signal.maximum,
+                        signal.minimum,
+                        signal.raw_initial if signal.raw_initial != None else 0,
+                        signal.raw_invalid,
+                        signal.comment,
+                    ))
+            self.message_ranges[filename] = (message_start, len(message_rows))
+            self.signal_ranges[filename] = (signal_start, len(signal_rows))
+
+        self.messages = _frame(message_rows, MESSAGE_COLUMNS)
+        self.signals = _frame(signal_rows, SIGNAL_COLUMNS)
+
+    @property
+    def files(self):
+        return list(self.message_ranges)
+
+    def messages_for(self, filename: Optional[str] = None) -> pd.DataFrame:
+        if filename is None:
+            return self.messages
+        start, end = self.message_ranges[filename]
+        return self.messages.iloc[start:end]
+
+    def signals_for(self, filename: Optional[str] = None) -> pd.DataFrame:
+        if filename is None:
+            return self.signals
+        start, end = self.signal_ranges[filename]
+        return self.signals.iloc[start:end]
+
+    def messages_table(self, filename: Optional[str] = None) -> pd.DataFrame:
+        """Таблица сообщений в виде, который показывает Streamlit."""
+        return self.messages_for(filename)[list(MESSAGE_DISPLAY)].rename(columns=MESSAGE_DISPLAY)
+
+    def signals_table(self, filename: Optional[str] = None) -> pd.DataFrame:
+        """Таблица сигналов в виде, который показывает Streamlit."""
+        return self.signals_for(filename)[list(SIGNAL_DISPLAY)].rename(columns=SIGNAL_DISPLAY)
+
+
+def catalog_for(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> Catalog:
+    """Каталог для набора баз; повторный вызов с теми же по содержимому базами берёт его из кэша."""
+    df_dbc = tl.as_dbc_dict(df_dbc)
+    return _catalogs.get(df_dbc, lambda: Catalog(df_dbc))
@@ -0,0 +1,297 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import cantools
+import cantools.database
+import numpy as np
+import pandas as pd
+
+import keyed_diff
+from matrix_loader import (
+    MSG_NAME_COL,
+    SIGNAL_NAME_COL,
+    ROUTE_NAME_COL,
+    ROUTE_ID_COL,
+    SIGNAL_ATTRIBUTE_COLUMNS,
+)
+
+ROUTE_SKIP_NAMES = ["nan", "Message Name", ""]
+
+NUMERIC_FIELDS = ["start_bit", "length", "scale", "offset", "max", "min"]
+RAW_FIELDS = ["init", "invalid"]
+
+ATTRIBUTE_MISMATCH_COLUMNS = ["message", "signal", "field", "excel", "dbc"]
+
+
+@dataclass
+class CheckResult:
+    """Результат сверки Excel-матрицы, DBC и RouteTable."""
+
+    id_mismatches: pd.DataFrame
+    attribute_mismatches: pd.DataFrame = field(
+        default_factory=lambda: pd.DataFrame(columns=ATTRIBUTE_MISMATCH_COLUMNS)
+    )
+    route_diff: List[keyed_diff.DiffRecord] = field(default_factory=list)
+    messages_only_excel: List[str] = field(default_factory=list)
+    messages_only_dbc: List[str] = field(default_factory=list)
+    signals_only_excel: List[str] = field(default_factory=list)
+    signals_only_dbc: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (
+            len(self.id_mismatches)
+            or len(self.attribute_mismatches)
+            or self.route_diff
+            or self.messages_only_excel
+            or self.messages_only_dbc
+            or self.signals_only_excel
+            or self.signals_only_dbc
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "ok": self.ok,
+            "id_mismatches": self.id_mismatches.to_dict(orient="records"),
+            "attribute_mismatches": self.attribute_mismatches.astype(str).to_dict(orient="records"),
+            "route_diff": [record._asdict() for record in self.route_diff],
+            "messages_only_excel": self.messages_only_excel,
+            "messages_only_dbc": self.messages_only_dbc,
+            "signals_only_excel": self.signals_only_excel,
+            "signals_only_dbc": self.signals_only_dbc,
+        }
+
+
+def normalize_hex_series(values: pd.Series) -> pd.Series:
+    """Векторный аналог main.normalize_hex: разбор hex выполняется один раз на уникальное значение."""
+    values = values.astype(str).str.strip()
+    uniques = values.unique()
+    mapping = {value: f"0x{int(value, 16):03X}" for value in uniques}
+    return values.map(mapping)
+
+
+def _names(values: pd.Series) -> pd.Index:
+    values = values.dropna().astype(str)
+    return pd.Index(values[values != "nan"].unique())
+
+
+def route_table_frame(dfRM: pd.DataFrame) -> pd.DataFrame:
+    names = dfRM[ROUTE_NAME_COL].astype(str)
+    rows = dfRM[~names.isin(ROUTE_SKIP_NAMES)]
+    frame = pd.DataFrame({
+        "message": rows[ROUTE_NAME_COL].astype(str),
+        "route_id": normalize_hex_series(rows[ROUTE_ID_COL]),
+    })
+    # Как и в прежнем dict-comprehension, при повторе имени побеждает последняя строка
+    return frame.drop_duplicates("message", keep="last")
+
+
+def dbc_messages_frame(dfdbc: cantools.database.can.database.Database) -> pd.DataFrame:
+    frame = pd.DataFrame(
+        [(message.name, message.frame_id) for message in dfdbc.messages],
+        columns=["message", "frame_id"],
+    )
+    frame["dbc_id"] = frame["frame_id"].map("0x{:03X}".format)
+    return frame[["message", "dbc_id"]].drop_duplicates("message", keep="last")
+
+
+def dbc_signals_frame(dfdbc: cantools.database.can.database.Database) -> pd.DataFrame:
+    """Колоночная таблица сигналов DBC с полями getSignalsDetailed."""
+    rows = []
+    for message in dfdbc.messages:
+        for signal in message.signals:
+            rows.append((
+                message.name,
+                signal.name,
+                signal.start,
+                signal.length,
+                signal.scale,
+                signal.offset,
+                signal.unit,
+                signal.is_signed,
+                signal.receivers,
+                signal.byte_order,
+                signal.maximum,
+                signal.minimum,
+                signal.raw_initial if signal.raw_initial != None else 0,
+                signal.raw_invalid,
+                signal.comment,
+            ))
+    return pd.DataFrame(rows, columns=[
+        "message", "signal", "start_bit", "length", "scale", "offset", "unit", "is_signed",
+        "recievers", "byte order", "max", "min", "init", "invalid", "description",
+    ])
+
+
+def _parse_raw(value, hex_numbers: bool = False):
+    # Колонки Initial/Invalid Value(Hex): строки всегда шестнадцатеричные, с 0x или без;
+    # hex_numbers — то же для чисел из Excel (ячейка 10 означает 0x10). Значения DBC — обычные int
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return np.nan
+    if isinstance(value, str):
+        value = value.strip()
+        if not value or value.lower() == "nan":
+            return np.nan
+        try:
+            return float(int(value, 16))
+        except ValueError:
+            return np.nan
+    if hex_numbers and float(value).is_integer():
+        try:
+            return float(int(str(int(value)), 16))
+        except ValueError:
+            return np.nan
+    return float(value)
+
+
+def _normalize_raw(values: pd.Series, hex_numbers: bool = False) -> pd.Series:
+    # Hex-строки разбираются один раз на уникальное значение
+    uniques = values.astype(object).unique()
+    mapping = {value: _parse_raw(value, hex_numbers) for value in uniques}
+    return values.astype(object).map(mapping).astype(float)
+
+
+def _normalize_text(values: pd.Series) -> pd.Series:
+    values = values.astype(object).where(values.notna(), "")
+    return values.astype(str).str.strip().replace("nan", "")
+
+
+def _normalize_byte_order(values: pd.Series) -> pd.Series:
+    values = _normalize_text(values).str.lower()
+    return np.where(
+        values.str.contains("motorola|big", regex=True), "big_endian",
+        np.where(values.str.contains("intel|little", regex=True), "little_endian", values),
+    )
+
+
+def _normalize_signed(values: pd.Series) -> pd.Series:
+    values = _normalize_text(values).str.lower()
+    return values.isin(["true", "signed", "1"]) | values.str.startswith("signed")
+
+
+def _normalize_receivers(values: pd.Series) -> pd.Series:
+    def key(value):
+        if isinstance(value, (list, tuple, set)):
+            return ",".join(sorted(str(v).strip() for v in value))
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return ""
+        return ",".join(sorted(v.strip() for v in str(value).replace(";", ",").split(",") if v.strip()))
+    return values.map(key)
+
+
+def compare_signal_attributes(
+    dfx: pd.DataFrame,
+    dfdbc: cantools.database.can.database.Database,
+    columns: Dict[str, str] = None,
+) -> pd.DataFrame:
+    """Сверка атрибутов сигналов Excel и DBC одним merge по (message, signal).
+
+    Возвращает таблицу расхождений: message, signal, field, excel, dbc.
+    Поля, для которых в Excel нет колонки, пропускаются.
+    """
+    columns = columns or SIGNAL_ATTRIBUTE_COLUMNS
+    present = {name: col for name, col in columns.items() if col in dfx.columns}
+    if not present:
+        return pd.DataFrame(columns=ATTRIBUTE_MISMATCH_COLUMNS)
+
+    excel = dfx[[MSG_NAME_COL, SIGNAL_NAME_COL] + list(present.values())].rename(
+        columns={MSG_NAME_COL: "message", SIGNAL_NAME_COL: "signal", **{col: name for name, col in present.items()}}
+    )
+    excel = excel[excel["message"].notna() & excel["signal"].notna()]
+    excel = excel.astype({"message": str, "signal": str}).drop_duplicates(["message", "signal"], keep="last")
+
+    merged = excel.merge(dbc_signals_frame(dfdbc), on=["message", "signal"], how="inner", suffixes=("_x", "_d"))
+
+    mismatches = []
+    for name in present:
+        x = merged[f"{name}_x"]
+        d = merged[f"{name}_d"]
+        if name in NUMERIC_FIELDS:
+            xn = pd.to_numeric(x, errors="coerce").to_numpy(dtype=float)
+            dn = pd.to_numeric(d, errors="coerce").to_numpy(dtype=float)
+            differs = ~np.isclose(xn, dn, equal_nan=True)
+        elif name in RAW_FIELDS:
+            differs = ~np.isclose(
+                _normalize_raw(x, hex_numbers=True).to_numpy(), _normalize_raw(d).to_numpy(), equal_nan=True
+            )
+        elif name == "byte order":
+            differs = _normalize_byte_order(x) != _normalize_byte_order(d)
+        elif name == "is_signed":
+            differs = (_normalize_signed(x) != d.astype(bool)).to_numpy()
+        elif name == "recievers":
+            differs = (_normalize_receivers(x) != _normalize_receivers(d)).to_numpy()
+        else:
+            differs = (_normalize_text(x) != _normalize_text(d)).to_numpy()
+
+        if differs.any():
+            rows = merged.loc[differs, ["message", "signal"]]
+            mismatches.append(pd.DataFrame({
+                "message": rows["message"].to_numpy(),
+                "signal": rows["signal"].to_numpy(),
+                "field": name,
+                "excel": x[differs].to_numpy(),
+                "dbc": d[differs].to_numpy(),
+            }))
+
+    if not mismatches:
+        return pd.DataFrame(columns=ATTRIBUTE_MISMATCH_COLUMNS)
+    return pd.concat(mismatches, ignore_index=True).sort_values(["message", "signal", "field"], ignore_index=True)
+
+
+def run_check(
+    dfx: pd.DataFrame, dfdbc: cantools.database.can.database.Database, dfRM: pd.DataFrame
+) -> CheckResult:
+    route = route_table_frame(dfRM)
+    dbc = dbc_messages_frame(dfdbc)
+
+    joined = dbc.merge(route, on="message", how="inner")
+    id_mismatches = joined[joined["dbc_id"] != joined["route_id"]].reset_index(drop=True)
+
+    route_diff = list(keyed_diff.diff_catalogs(
+        dict(zip(dbc["message"], dbc["dbc_id"])),
+        dict(zip(route["message"], route["route_id"])),
+    ))
+
+    messagesX = _names(dfx[MSG_NAME_COL])
+    messagesDBC = _names(dbc["message"])
+
+    signalsX = _names(dfx[SIGNAL_NAME_COL])
+    signalsDBC = _names(pd.Series([signal.name for message in dfdbc.messages for signal in message.signals], dtype=object))
+
+    return CheckResult(
+        id_mismatches=id_mismatches,
+        attribute_mismatches=compare_signal_attributes(dfx, dfdbc),
+        route_diff=route_diff,
+        messages_only_excel=sorted(messagesX.difference(messagesDBC)),
+        messages_only_dbc=sorted(messagesDBC.difference(messagesX)),
+        signals_only_excel=sorted(signalsX.difference(signalsDBC)),
+        signals_only_dbc=sorted(signalsDBC.difference(signalsX)),
+    )
+
+
+def log_result(result: CheckResult, logger: logging.Logger):
+    logger.info("===START CHECKING===")
+
+    for row in result.id_mismatches.itertuples(index=False):
+        logger.warning(f"ID mismatch: {row.message} (DBC={row.dbc_id}, RouteTable={row.route_id})")
+
+    for record in result.route_diff:
+        if record.kind == keyed_diff.CHANGED:
+            logger.info(f"{record.kind} : {record.key} (DBC={record.old}, RouteTable={record.new})")
+        elif record.kind == keyed_diff.ADDED:
+            logger.info(f"{record.kind} : {record.key} (только в RouteTable, {record.new})")
+        else:
+            logger.info(f"{record.kind} : {record.key} (только в DBC, {record.old})")
+
+    logger.info("===CHECKING MESSAGES===")
+    logger.info(f"xlsx - dbc (сообщения только в Excel) = {set(result.messages_only_excel)}")
+    logger.info(f"dbc - xlsx (сообщения только в DBC) = {set(result.messages_only_dbc)}")
+
+    logger.info("===CHECKING SIGNAL ATTRIBUTES===")
+    for row in result.attribute_mismatches.itertuples(index=False):
+        logger.warning(f"Attribute mismatch: {row.message}.{row.signal} {row.field} (xlsx={row.excel}, DBC={row.dbc})")
+
+    logger.info("===CHECKING SIGNALS===")
+    logger.info(f"xlsx - dbc (сигналы только в Excel) = {set(result.signals_only_excel)}")
+    logger.info(f"dbc - xlsx (сигналы только в DBC) = {set(result.signals_only_dbc)}")
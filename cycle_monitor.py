@@ -0,0 +1,174 @@
+import math
+import time
+import logging
+import argparse
+from typing import Callable, Dict, NamedTuple, Optional, Union
+
+import can
+import cantools
+import cantools.database
+import pandas as pd
+
+import test_libs as tl
+from frame_ids import EXTENDED_FLAG, frame_key
+
+logger = logging.getLogger(__name__)
+
+LATE = "late"
+MISSED = "missed"
+
+
+class Violation(NamedTuple):
+    kind: str
+    message: str
+    frame_id: int
+    timestamp: float
+    interval: float
+    expected: float
+
+
+class CycleStats:
+    """Скользящая статистика интервалов одного ID за O(1) памяти (алгоритм Уэлфорда)."""
+
+    __slots__ = ("name", "frame_id", "expected", "count", "last", "mean", "m2", "max", "late", "missed")
+
+    def __init__(self, name: str, frame_id: int, expected: float):
+        self.name = name
+        self.frame_id = frame_id
+        self.expected = expected
+        self.count = 0
+        self.last = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = 0.0
+        self.late = 0
+        self.missed = 0
+
+    @property
+    def jitter(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class CycleMonitor:
+    """Проверка периодичности кадров относительно message.cycle_time из DBC.
+
+    Интервал больше expected * (1 + tolerance) считается опозданием (late),
+    интервал от 1.5 * expected — пропуском round(interval / expected) - 1 кадров.
+    """
+
+    def __init__(
+        self,
+        df_dbc: Union[cantools.database.can.database.Database, Dict],
+        tolerance: float = 0.1,
+        on_violation: Optional[Callable[[Violation], None]] = None,
+    ):
+        df_dbc = tl.as_dbc_dict(df_dbc)
+        self.tolerance = tolerance
+        self.on_violation = on_violation
+        self.frames = 0
+        self.unmonitored = 0
+        self.stats = {}
+        for db in df_dbc.values():
+            for message in db.messages:
+                if message.cycle_time:
+                    key = frame_key(message.frame_id, message.is_extended_frame)
+                    self.stats.setdefault(key, CycleStats(message.name, message.frame_id, message.cycle_time / 1000.0))
+
+    def feed(self, key: int, timestamp: float):
+        self.frames += 1
+        stats = self.stats.get(key)
+        if stats is None:
+            self.unmonitored += 1
+            return
+        last = stats.last
+        stats.last = timestamp
+        if last is None:
+            return
+
+        interval = timestamp - last
+        stats.count += 1
+        delta = interval - stats.mean
+        stats.mean += delta / stats.count
+        stats.m2 += delta * (interval - stats.mean)
+        if interval > stats.max:
+            stats.max = interval
+
+        expected = stats.expected
+        if interval >= 1.5 * expected:
+            lost = int(round(interval / expected)) - 1
+            stats.missed += lost
+            self._report(MISSED, stats, timestamp, interval)
+        elif interval > expected * (1 + self.tolerance):
+            stats.late += 1
+            self._report(LATE, stats, timestamp, interval)
+
+    def _report(self, kind: str, stats: CycleStats, timestamp: float, interval: float):
+        if self.on_violation is not None:
+            self.on_violation(Violation(kind, stats.name, stats.frame_id, timestamp, interval, stats.expected))
+
+    def feed_frame(self, frame: can.Message):
+        if frame.is_error_frame or frame.is_remote_frame:
+            return
+        key = frame.arbitration_id | EXTENDED_FLAG if frame.is_extended_id else frame.arbitration_id
+        self.feed(key, frame.timestamp)
+
+    def run_log(self, log_path: str):
+        for frame in can.LogReader(log_path):
+            self.feed_frame(frame)
+        return self.report()
+
+    def run_bus(self, bus: can.BusABC, duration: float):
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            frame = bus.recv(timeout=0.1)
+            if frame is not None:
+                self.feed_frame(frame)
+        return self.report()
+
+    def report(self) -> pd.DataFrame:
+        rows = []
+        for stats in self.stats.values():
+            rows.append({
+                "message": stats.name,
+                "id": f"0x{stats.frame_id:X}",
+                "expected_ms": stats.expected * 1000,
+                "intervals": stats.count,
+                "mean_ms": stats.mean * 1000,
+                "jitter_ms": stats.jitter * 1000,
+                "max_ms": stats.max * 1000,
+                "late": stats.late,
+                "missed": stats.missed,
+                "seen": stats.last is not None,
+            })
+        return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Контроль периодичности сообщений по cycle_time из DBC")
+    parser.add_argument("dbc", nargs="+")
+    parser.add_argument("--log")
+    parser.add_argument("--interface", default="socketcan")
+    parser.add_argument("--channel", default="vcan0")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    def on_violation(violation: Violation):
+        logger.warning(
+            f"{violation.kind}: {violation.message} (0x{violation.frame_id:X}) "
+            f"interval={violation.interval * 1000:.1f} ms, expected={violation.expected * 1000:.1f} ms"
+        )
+
+    monitor = CycleMonitor(tl.read_dbc(args.dbc), tolerance=args.tolerance, on_violation=on_violation)
+    if args.log:
+        report = monitor.run_log(args.log)
+    else:
+        with can.Bus(interface=args.interface, channel=args.channel) as bus:
+            report = monitor.run_bus(bus, args.duration)
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import os
+import pickle
+import hashlib
+import weakref
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import cantools
+import cantools.database
+
+CACHE_DIR = ".dbc_cache"
+# Предел размера каталога кэша на диске; сверх него удаляются давно не читанные pickle
+MAX_DISK_BYTES = 512 * 1024 * 1024
+
+# Базы, выданные кэшами, -> хэш содержимого; по нему кэшируются производные структуры
+_sources = weakref.WeakKeyDictionary()
+_sources_lock = threading.Lock()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class DbcCache:
+    """Кэш разобранных DBC по хэшу содержимого (LRU в памяти + pickle на диске).
+
+    Каталог на диске ограничен max_disk_bytes: после каждой записи удаляются
+    *.pickle с самым старым mtime (чтение обновляет mtime), включая индексы
+    lazy_dbc из того же каталога. None отключает ограничение.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 16,
+        cache_dir: Optional[str] = CACHE_DIR,
+        max_disk_bytes: Optional[int] = MAX_DISK_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{key}-{cantools.__version__}.pickle")
+
+    def _remember(self, key: str, db):
+        with _sources_lock:
+            _sources[db] = key
+        with self._lock:
+            self._entries[key] = db
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str):
+        path = self._disk_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                db = pickle.load(f)
+        except Exception:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return db
+
+    def _write_disk(self, key: str, db):
+        path = self._disk_path(key)
+        if not path:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(db, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        self._prune()
+
+    def _prune(self):
+        if not self.max_disk_bytes:
+            return
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".pickle") and entry.is_file():
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+
+    def lookup(self, key: str):
+        with self._lock:
+            db = self._entries.get(key)
+            if db is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return db
+
+    def store(self, key: str, db):
+        self._remember(key, db)
+
+    def get(self, data: bytes, parse: Callable[[], "cantools.database.can.database.Database"]):
+        key = content_hash(data)
+        db = self.lookup(key)
+        if db is not None:
+            return db
+
+        db = self._read_disk(key)
+        if db is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            db = parse()
+            self._write_disk(key, db)
+        self._remember(key, db)
+        return db
+
+    def load_file(self, file_path: str):
+        with open(file_path, "rb") as f:
+            data = f.read()
+        return self.get(data, lambda: cantools.database.load_file(file_path))
+
+    def load_bytes(self, data: bytes, database_format: str = "dbc", encoding: str = "cp1252"):
+        return self.get(
+            data,
+            lambda: cantools.database.load_string(data.decode(encoding), database_format=database_format),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+def source_key(db) -> Optional[tuple]:
+    """Ключ содержимого базы для кэшей производных структур или None, если кэшировать нельзя.
+
+    Для cantools.Database это хэш файла, из которого её разобрал DbcCache, и число
+    сообщений (правка на месте через messages.append + refresh меняет ключ). Базы не
+    из кэша — копии EditSession, результат cantools.database.load_file — ключа не имеют.
+    SignalStore и LazyDbc неизменяемы и хранят хэш в атрибуте key.
+    """
+    if isinstance(db, cantools.database.can.database.Database):
+        with _sources_lock:
+            key = _sources.get(db)
+        return None if key is None else (key, len(db.messages))
+    key = getattr(db, "key", None)
+    return (key,) if isinstance(key, str) else None
+
+
+class DerivedCache:
+    """LRU структур, построенных по набору баз (каталог, индекс), с ключом по содержимому.
+
+    Ключ — имена файлов и source_key баз, а не id() объектов, поэтому одинаковые
+    загрузки разных сессий делят результат, а изменённые базы его не получают.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dbc_data: Dict, build: Callable):
+        parts = []
+        for name, db in dbc_data.items():
+            key = source_key(db)
+            if key is None:
+                return build()
+            parts.append((name, key))
+        key = tuple(parts)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+default_cache = DbcCache()
+
+
+def load_file(file_path: str):
+    return default_cache.load_file(file_path)
+
+
+def load_bytes(data: bytes, database_format: str = "dbc", encoding: str = "cp1252"):
+    return default_cache.load_bytes(data, database_format=database_format, encoding=encoding)
+
+
+def stats() -> Dict:
+    return default_cache.stats()
@@ -0,0 +1,101 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple, Union
+
+import cantools
+import cantools.database
+
+import dbc_cache
+import test_libs as tl
+from frame_ids import frame_key
+
+_indexes = dbc_cache.DerivedCache(max_entries=8)
+
+
+class DbcIndex:
+    """Глобальный индекс по всем загруженным DBC.
+
+    Имя сообщения, frame ID, имя сигнала и ECU отображаются в списки
+    (файл, имя сообщения). Индекс обновляется инкрементально при добавлении
+    сообщения, а конфликты ID/имён между файлами отслеживаются сразу —
+    проверка любого ключа O(1).
+    """
+
+    def __init__(self, df_dbc: Union[cantools.database.can.database.Database, Dict, None] = None):
+        self.messages = defaultdict(list)    # name -> [(file, frame_key)]
+        self.frame_ids = defaultdict(list)   # frame_key -> [(file, name)]
+        self.signals = defaultdict(list)     # signal name -> [(file, message name)]
+        self.ecus = defaultdict(list)        # ecu -> [(file, message name)]
+        self.id_conflicts = set()            # frame_key с разными именами сообщений
+        self.name_conflicts = set()          # имена сообщений с разными ID
+        if df_dbc is not None:
+            for filename, db in tl.as_dbc_dict(df_dbc).items():
+                self.add_database(filename, db)
+
+    def add_database(self, filename: str, db: cantools.database.can.database.Database):
+        for node in db.nodes:
+            self.ecus.setdefault(node.name, [])
+        for message in db.messages:
+            self.add_message(filename, message)
+
+    def add_message(self, filename: str, message: cantools.database.can.Message):
+        key = frame_key(message.frame_id, message.is_extended_frame)
+
+        owners = self.frame_ids[key]
+        if owners and owners[0][1] != message.name:
+            self.id_conflicts.add(key)
+        owners.append((filename, message.name))
+
+        entries = self.messages[message.name]
+        if entries and entries[0][1] != key:
+            self.name_conflicts.add(message.name)
+        entries.append((filename, key))
+
+        for signal in message.signals:
+            self.signals[signal.name].append((filename, message.name))
+
+        ecus = set(message.senders or [])
+        for signal in message.signals:
+            ecus.update(signal.receivers or [])
+        for ecu in ecus:
+            self.ecus[ecu].append((filename, message.name))
+
+    def has_message(self, name: str) -> bool:
+        return name in self.messages
+
+    def has_frame_id(self, frame_id: int, is_extended: bool = False) -> bool:
+        return frame_key(frame_id, is_extended) in self.frame_ids
+
+    def files_for_id(self, frame_id: int, is_extended: bool = False) -> List[Tuple[str, str]]:
+        return list(self.frame_ids.get(frame_key(frame_id, is_extended), []))
+
+    def files_for_message(self, name: str) -> List[str]:
+        return [filename for filename, _ in self.messages.get(name, [])]
+
+    def message_names(self) -> List[str]:
+        return list(self.messages)
+
+    def ecu_names(self) -> List[str]:
+        return sorted(self.ecus)
+
+    def conflicts(self) -> Dict[str, List]:
+        return {
+            "ids": [
+                {"frame_id": f"0x{key & 0x1FFFFFFF:X}", "owners": self.frame_ids[key]}
+                for key in sorted(self.id_conflicts)
+            ],
+            "names": [
+                {"message": name, "ids": sorted({f"0x{key & 0x1FFFFFFF:X}" for _, key in self.messages[name]})}
+                for name in sorted(self.name_conflicts)
+            ],
+        }
+
+
+def index_for(dbc_data: Dict) -> DbcIndex:
+    """Индекс для набора баз; повторный вызов с теми же по содержимому базами берёт его из кэша.
+
+    dbc_cache и signal_store отдают одни и те же объекты для одинаковых файлов,
+    поэтому при перезапусках Streamlit индекс не перестраивается. Результат общий
+    для всех вызывающих — изменять его (add_message/add_database) нельзя; для
+    изменённых баз нужен отдельный DbcIndex.
+    """
+    return _indexes.get(dbc_data, lambda: DbcIndex(dbc_data))
@@ -0,0 +1,8 @@
+# Ключ кадра для словарей по frame ID: расширенные ID помечаются старшим битом,
+# как в поле ID оператора BO_ в DBC, чтобы стандартный 0x100 и расширенный
+# 0x100 не совпадали. Модуль без зависимостей — его импортируют загрузчики DBC.
+EXTENDED_FLAG = 1 << 31
+
+
+def frame_key(frame_id: int, is_extended: bool) -> int:
+    return frame_id | EXTENDED_FLAG if is_extended else frame_id
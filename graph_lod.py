@@ -0,0 +1,162 @@
+import json
+from typing import List
+
+MESSAGE_LABELS = [
+    "Name message", "Sender", "Recievers", "Send type", "Cycle type", "ID", "Length", "Signals",
+]
+
+SIGNAL_LABELS = [
+    "Name signal", "Recievers", "Byte order", "Cycle type", "Start bit", "Min value", "Max value",
+    "Signal Value Description", "Initianal value", "Invalid value", "Scale", "Offset", "Description",
+    "Lenght", "Unit",
+]
+
+
+def format_choices(choices):
+    if not choices:
+        return "None"
+    return "".join([f"0x{int(k):X}: {v} " for k, v in choices.items()])
+
+
+def message_fields(message) -> List[str]:
+    return [
+        message.name,
+        str(message.senders),
+        str(message.receivers),
+        str(message.send_type),
+        str(message.cycle_time),
+        f"0x{message.frame_id:X}",
+        f"{message.length} bytes",
+        str(len(message.signals)),
+    ]
+
+
+def signal_fields(message, signal) -> List[str]:
+    return [
+        signal.name,
+        str(signal.receivers),
+        str(signal.byte_order),
+        str(message.cycle_time),
+        str(signal.start),
+        str(signal.minimum),
+        str(signal.maximum),
+        format_choices(signal.choices if hasattr(signal, "choices") else None),
+        str(signal.raw_initial if signal.raw_initial != None else 0),
+        str(signal.raw_invalid),
+        str(signal.scale),
+        str(signal.offset),
+        str(signal.comment),
+        f"{signal.length} bit",
+        str(signal.unit),
+    ]
+
+
+def message_tooltip(message) -> str:
+    return "\n".join(f"{label}: {value}" for label, value in zip(MESSAGE_LABELS, message_fields(message)))
+
+
+def signal_tooltip(message, signal) -> str:
+    return "\n".join(f"{label}: {value}" for label, value in zip(SIGNAL_LABELS, signal_fields(message, signal)))
+
+
+def graph_options(lazy: bool = False) -> str:
+    """Опции vis-network для set_options.
+
+    В ленивом режиме подсказки заполняются в обработчике hoverNode, а
+    vis-network шлёт это событие только при interaction.hover = true.
+    """
+    options = {"configure": {"enabled": True}, "nodes": {"font": {"size": 12}}}
+    if lazy:
+        options["interaction"] = {"hover": True}
+    return json.dumps(options)
+
+
+class LodPayload:
+    """Компактные данные для ленивого раскрытия сообщений в графе.
+
+    Вместо узлов сигналов и многострочных title в HTML попадают только
+    массивы значений; подсказки и узлы сигналов строятся в браузере по клику/наведению.
+    """
+
+    def __init__(self, signal_color: str = "#34A853"):
+        self.signal_color = signal_color
+        self.messages = {}
+        self.signals = {}
+
+    def add_message(self, node_id: str, message, signal_ids: List[str]):
+        self.messages[node_id] = message_fields(message)
+        self.signals[node_id] = [
+            [signal_id] + signal_fields(message, signal)
+            for signal_id, signal in zip(signal_ids, message.signals)
+        ]
+
+    def to_json(self) -> str:
+        data = {"messages": self.messages, "signals": self.signals}
+        # "</" внутри <script> закрыл бы тег раньше времени
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+    def script(self) -> str:
+        return LOD_JS_TEMPLATE % {
+            "data": self.to_json(),
+            "message_labels": json.dumps(MESSAGE_LABELS),
+            "signal_labels": json.dumps(SIGNAL_LABELS),
+            "signal_color": self.signal_color,
+        }
+
+    def inject(self, html: str) -> str:
+        return html.replace("</body>", self.script() + "</body>")
+
+
+LOD_JS_TEMPLATE = """
+    <script>
+    var lodData = %(data)s;
+    var lodMessageLabels = %(message_labels)s;
+    var lodSignalLabels = %(signal_labels)s;
+    var lodSignalInfo = {};
+    var lodExpanded = {};
+
+    function lodTooltip(labels, values) {
+        return labels.map(function (label, i) { return label + ": " + values[i]; }).join("\\n");
+    }
+
+    network.on("hoverNode", function (params) {
+        var node = nodes.get(params.node);
+        if (!node || node.title) {
+            return;
+        }
+        if (lodData.messages[params.node]) {
+            nodes.update({id: params.node, title: lodTooltip(lodMessageLabels, lodData.messages[params.node])});
+        } else if (lodSignalInfo[params.node]) {
+            nodes.update({id: params.node, title: lodTooltip(lodSignalLabels, lodSignalInfo[params.node])});
+        }
+    });
+
+    network.on("click", function (params) {
+        if (!params.nodes.length) {
+            return;
+        }
+        var id = params.nodes[0];
+        var signals = lodData.signals[id];
+        if (!signals) {
+            return;
+        }
+        if (lodExpanded[id]) {
+            nodes.remove(lodExpanded[id]);
+            edges.remove(lodExpanded[id].map(function (sid) { return sid + "_edge"; }));
+            delete lodExpanded[id];
+            return;
+        }
+        var newNodes = [];
+        var newEdges = [];
+        signals.forEach(function (row) {
+            var sid = row[0];
+            lodSignalInfo[sid] = row.slice(1);
+            newNodes.push({id: sid, label: row[1], level: 2, color: "%(signal_color)s", size: 10, shape: "dot"});
+            newEdges.push({id: sid + "_edge", from: id, to: sid});
+        });
+        nodes.add(newNodes);
+        edges.add(newEdges);
+        lodExpanded[id] = newNodes.map(function (n) { return n.id; });
+    });
+    </script>
+    """
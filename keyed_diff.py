@@ -0,0 +1,64 @@
+from typing import Any, Dict, Hashable, Iterator, Mapping, NamedTuple, Tuple
+
+import cantools
+import cantools.database
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+class DiffRecord(NamedTuple):
+    kind: str
+    key: Hashable
+    old: Any = None
+    new: Any = None
+
+
+def diff_catalogs(old: Mapping, new: Mapping) -> Iterator[DiffRecord]:
+    """Потоковый diff двух каталогов key -> value за O(len(old) + len(new)).
+
+    Сначала выдаются removed/changed в порядке old, затем added в порядке new.
+    """
+    for key, old_value in old.items():
+        if key not in new:
+            yield DiffRecord(REMOVED, key, old_value, None)
+        else:
+            new_value = new[key]
+            if old_value != new_value:
+                yield DiffRecord(CHANGED, key, old_value, new_value)
+    for key, new_value in new.items():
+        if key not in old:
+            yield DiffRecord(ADDED, key, None, new_value)
+
+
+def summarize(records) -> Dict[str, int]:
+    counts = {ADDED: 0, REMOVED: 0, CHANGED: 0}
+    for record in records:
+        counts[record.kind] += 1
+    return counts
+
+
+def message_catalog(dfdbc: cantools.database.can.database.Database) -> Dict[str, str]:
+    return {message.name: f"0x{message.frame_id:03X}" for message in dfdbc.messages}
+
+
+def signal_catalog(dfdbc: cantools.database.can.database.Database) -> Dict[Tuple[str, str], Tuple]:
+    catalog = {}
+    for message in dfdbc.messages:
+        for signal in message.signals:
+            catalog[(message.name, signal.name)] = (
+                signal.start,
+                signal.length,
+                signal.byte_order,
+                signal.is_signed,
+                signal.scale,
+                signal.offset,
+                signal.minimum,
+                signal.maximum,
+                signal.unit,
+                signal.raw_initial,
+                signal.raw_invalid,
+                tuple(sorted(signal.receivers)),
+            )
+    return catalog
@@ -0,0 +1,123 @@
+from typing import Dict, List, Union
+
+import cantools
+import cantools.database
+import numpy as np
+import pandas as pd
+
+import test_libs as tl
+
+MAX_BITS = 64 * 8  # CAN-FD: до 64 байт полезной нагрузки
+CHUNK = 8192
+
+OVERLAP_COLUMNS = ["file", "message", "signal_a", "signal_b", "bits"]
+BOUNDS_COLUMNS = ["file", "message", "signal", "start_bit", "length", "byte_order", "message_length"]
+
+_LINEAR = np.arange(MAX_BITS)
+# Нумерация Motorola "вперёд": внутри байта биты идут от 7 к 0, байты по возрастанию
+_FORWARD = (_LINEAR // 8) * 8 + (7 - _LINEAR % 8)
+
+
+def _occupancy(lo: np.ndarray, hi: np.ndarray, is_be: np.ndarray) -> np.ndarray:
+    """Битовая маска (n, MAX_BITS) занятых бит каждого сигнала в линейной нумерации."""
+    columns = np.where(is_be[:, None], _FORWARD[None, :], _LINEAR[None, :])
+    return (columns >= lo[:, None]) & (columns < hi[:, None])
+
+
+def check_arrays(
+    msg_idx: np.ndarray,
+    start: np.ndarray,
+    length: np.ndarray,
+    is_be: np.ndarray,
+    msg_len: np.ndarray,
+):
+    """Проверка раскладки сигналов по массивам.
+
+    msg_idx/start/length/is_be — по одному элементу на сигнал, msg_len — длина
+    сообщения в байтах (по индексу сообщения). Возвращает маску сигналов за
+    границами сообщения и список пар (i, j, bits) перекрывающихся сигналов.
+    """
+    msg_idx = np.asarray(msg_idx, dtype=np.int64)
+    start = np.asarray(start, dtype=np.int64)
+    length = np.asarray(length, dtype=np.int64)
+    is_be = np.asarray(is_be, dtype=bool)
+    msg_len = np.asarray(msg_len, dtype=np.int64)
+
+    # Для Motorola start — MSB в DBC-нумерации, переводим в нумерацию "вперёд"
+    lo = np.where(is_be, (start // 8) * 8 + (7 - start % 8), start)
+    hi = lo + length
+    out_of_bounds = (lo < 0) | (hi > msg_len[msg_idx] * 8) | (length <= 0)
+
+    counts = np.zeros((len(msg_len), MAX_BITS), dtype=np.uint16)
+    for begin in range(0, len(start), CHUNK):
+        end = begin + CHUNK
+        np.add.at(counts, msg_idx[begin:end], _occupancy(lo[begin:end], hi[begin:end], is_be[begin:end]))
+
+    overlaps = []
+    for message in np.flatnonzero((counts > 1).any(axis=1)):
+        members = np.flatnonzero(msg_idx == message)
+        occ = _occupancy(lo[members], hi[members], is_be[members])
+        shared = occ.astype(np.uint16) @ occ.T.astype(np.uint16)
+        for a, b in zip(*np.nonzero(np.triu(shared, k=1))):
+            bits = np.flatnonzero(occ[a] & occ[b]).tolist()
+            overlaps.append((members[a], members[b], bits))
+    return out_of_bounds, overlaps
+
+
+def check_layout(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> Dict[str, pd.DataFrame]:
+    """Поиск перекрытий сигналов и выхода за message.length во всех загруженных DBC.
+
+    Принимает одну базу или dict {имя файла: база}, как test_libs.read_dbc.
+    """
+    files, messages, message_lengths = [], [], []
+    signals, msg_idx, start, length, is_be = [], [], [], [], []
+
+    for filename, db in tl.as_dbc_dict(df_dbc).items():
+        for message in db.messages:
+            index = len(messages)
+            files.append(filename)
+            messages.append(message.name)
+            message_lengths.append(message.length)
+            for signal in message.signals:
+                signals.append(signal)
+                msg_idx.append(index)
+                start.append(signal.start)
+                length.append(signal.length)
+                is_be.append(signal.byte_order == "big_endian")
+
+    out_of_bounds, overlaps = check_arrays(msg_idx, start, length, is_be, message_lengths)
+
+    bounds_rows = []
+    for i in np.flatnonzero(out_of_bounds):
+        signal = signals[i]
+        m = msg_idx[i]
+        bounds_rows.append((files[m], messages[m], signal.name, signal.start, signal.length, signal.byte_order, message_lengths[m]))
+
+    overlap_rows = []
+    for a, b, bits in overlaps:
+        m = msg_idx[a]
+        overlap_rows.append((files[m], messages[m], signals[a].name, signals[b].name, bits))
+
+    return {
+        "overlaps": pd.DataFrame(overlap_rows, columns=OVERLAP_COLUMNS),
+        "out_of_bounds": pd.DataFrame(bounds_rows, columns=BOUNDS_COLUMNS),
+    }
+
+
+def check_signal_rows(signals: List[Dict], message_length: int) -> List[str]:
+    """Проверка сигналов одного сообщения из формы Streamlit (ключи start_bit, length, byte_order)."""
+    if not signals:
+        return []
+    out_of_bounds, overlaps = check_arrays(
+        np.zeros(len(signals), dtype=np.int64),
+        [signal["start_bit"] for signal in signals],
+        [signal["length"] for signal in signals],
+        [signal["byte_order"] == "big_endian" for signal in signals],
+        [message_length],
+    )
+    errors = []
+    for i in np.flatnonzero(out_of_bounds):
+        errors.append(f"Сигнал '{signals[i]['name']}' выходит за границы сообщения ({message_length} байт)")
+    for a, b, bits in overlaps:
+        errors.append(f"Сигналы '{signals[a]['name']}' и '{signals[b]['name']}' перекрываются (биты {bits})")
+    return errors
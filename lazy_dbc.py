@@ -0,0 +1,197 @@
+import os
+import re
+import mmap
+import pickle
+import logging
+import contextlib
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import cantools
+import cantools.database
+
+import dbc_cache
+from frame_ids import frame_key
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# Строки в кавычках поглощаются целиком, чтобы ключевые слова внутри CM_ не
+# считались началом оператора; операторы DBC начинаются с первой колонки
+_STATEMENT = re.compile(rb'"(?:[^"\\]|\\.)*"|^([A-Z][A-Z0-9_]*)', re.M)
+_MESSAGE = re.compile(rb"BO_\s+(\d+)\s+(\w+)\s*:")
+# Операторы, относящиеся к одному сообщению: номер группы — raw ID из BO_
+_RELATED = {
+    b"CM_": re.compile(rb"CM_\s+(?:BO_|SG_)\s+(\d+)"),
+    b"VAL_": re.compile(rb"VAL_\s+(\d+)"),
+    b"BA_": re.compile(rb'BA_\s+"[^"]*"\s+(?:BO_|SG_)\s+(\d+)'),
+    b"BA_REL_": re.compile(rb'BA_REL_\s+"[^"]*"\s+BU_(?:SG|BO)_REL_\s+\w+\s+(?:SG_\s+)?(\d+)'),
+    b"BO_TX_BU_": re.compile(rb"BO_TX_BU_\s+(\d+)"),
+    b"SIG_VALTYPE_": re.compile(rb"SIG_VALTYPE_\s+(\d+)"),
+    b"SG_MUL_VAL_": re.compile(rb"SG_MUL_VAL_\s+(\d+)"),
+    b"SIG_GROUP_": re.compile(rb"SIG_GROUP_\s+(\d+)"),
+}
+
+
+def scan(data: Union[bytes, mmap.mmap]) -> Dict:
+    """Один проход по тексту DBC: смещения блоков BO_ и связанных с ними операторов.
+
+    Возвращает {"messages": [(name, raw_id, start, end)], "related": {raw_id: [(start, end)]},
+    "globals": [(start, end)]}; всё, что не привязано к сообщению (VERSION, BU_,
+    BA_DEF_, атрибуты узлов и т.п.), попадает в globals.
+    """
+    starts = [(match.start(), match.group(1)) for match in _STATEMENT.finditer(data) if match.group(1)]
+    messages = []
+    related = {}
+    globals_ = []
+    for i, (start, keyword) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(data)
+        head = data[start:min(end, start + 256)]
+        if keyword == b"BO_":
+            match = _MESSAGE.match(head)
+            if match:
+                messages.append((match.group(2).decode("ascii"), int(match.group(1)), start, end))
+                continue
+        pattern = _RELATED.get(keyword)
+        match = pattern.match(head) if pattern is not None else None
+        if match:
+            related.setdefault(int(match.group(1)), []).append((start, end))
+        else:
+            globals_.append((start, end))
+    return {"messages": messages, "related": related, "globals": globals_}
+
+
+class LazyDbc:
+    """DBC с разбором отдельных сообщений по запросу.
+
+    Индекс смещений строится одним проходом и кэшируется на диске рядом с
+    кэшем dbc_cache (по хэшу содержимого). Файл отображается в память только
+    на время чтения, так что открытых дескрипторов объект не держит; если файл
+    изменился на диске, индекс строится заново. Полный cantools.Database
+    строится только при вызове load().
+    """
+
+    def __init__(self, file_path: str, cache_dir: Optional[str] = dbc_cache.CACHE_DIR, encoding: str = "cp1252"):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.cache_dir = cache_dir
+        self._stat = None
+        with self._mapped():
+            pass
+
+    @contextlib.contextmanager
+    def _mapped(self) -> Iterator[Union[bytes, mmap.mmap]]:
+        with open(self.file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Пустой файл нельзя отобразить в память
+                data = b""
+            try:
+                if self._stat != (stat.st_size, stat.st_mtime_ns):
+                    self._stat = (stat.st_size, stat.st_mtime_ns)
+                    self._build(data)
+                yield data
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+    def _build(self, data: Union[bytes, mmap.mmap]):
+        self.key = dbc_cache.content_hash(data)
+        self.index = self._load_index(data)
+        self._by_name = {name: i for i, (name, _, _, _) in enumerate(self.index["messages"])}
+        self._by_key = {}
+        for i, (_, raw_id, _, _) in enumerate(self.index["messages"]):
+            self._by_key.setdefault(frame_key(raw_id & 0x7FFFFFFF, bool(raw_id & 0x80000000)), i)
+        self._globals = None
+        self._parsed = {}
+        self._database = None
+
+    def _load_index(self, data: Union[bytes, mmap.mmap]) -> Dict:
+        cache_dir = self.cache_dir
+        path = os.path.join(cache_dir, f"{self.key}-index-v{INDEX_VERSION}.pickle") if cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    return pickle.load(f)
+            except Exception as e:
+                logger.debug(f"DBC index cache unreadable {path}: {e}")
+        index = scan(data)
+        if path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except Exception as e:
+                logger.debug(f"DBC index cache not written for {path}: {e}")
+        return index
+
+    def _text(self, data: Union[bytes, mmap.mmap], spans: List[Tuple[int, int]]) -> str:
+        return b"".join(data[start:end] for start, end in spans).decode(self.encoding)
+
+    def __len__(self) -> int:
+        return len(self.index["messages"])
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def message_names(self) -> List[str]:
+        return [name for name, _, _, _ in self.index["messages"]]
+
+    def _parse(self, i: int, data: Union[bytes, mmap.mmap]) -> cantools.database.can.Message:
+        message = self._parsed.get(i)
+        if message is None:
+            if self._globals is None:
+                self._globals = self._text(data, self.index["globals"])
+            _, raw_id, start, end = self.index["messages"][i]
+            text = self._globals + self._text(data, [(start, end)] + self.index["related"].get(raw_id, []))
+            message = cantools.database.load_string(text, database_format="dbc").messages[0]
+            self._parsed[i] = message
+        return message
+
+    def get_message_by_name(self, name: str) -> cantools.database.can.Message:
+        if self._database is not None:
+            return self._database.get_message_by_name(name)
+        message = self._parsed.get(self._by_name[name])
+        if message is None:
+            with self._mapped() as data:
+                # Индекс мог быть перестроен при открытии — номер берём заново
+                message = self._parse(self._by_name[name], data)
+        return message
+
+    def get_message_by_frame_id(self, frame_id: int, is_extended: bool = False) -> cantools.database.can.Message:
+        if self._database is not None:
+            return self._database.get_message_by_frame_id(frame_id)
+        key = frame_key(frame_id, is_extended)
+        message = self._parsed.get(self._by_key[key])
+        if message is None:
+            with self._mapped() as data:
+                message = self._parse(self._by_key[key], data)
+        return message
+
+    def iter_messages(self) -> Iterator[cantools.database.can.Message]:
+        """Все сообщения по порядку; файл открыт, пока идёт перебор."""
+        with self._mapped() as data:
+            for i in range(len(self)):
+                yield self._parse(i, data)
+
+    def load(self) -> cantools.database.can.database.Database:
+        """Полный разбор через dbc_cache; повторные вызовы отдают тот же объект."""
+        if self._database is None:
+            with self._mapped() as data:
+                self._database = dbc_cache.default_cache.get(
+                    data, lambda: cantools.database.load_string(bytes(data).decode(self.encoding))
+                )
+        return self._database
+
+
+def materialize(df_dbc):
+    """LazyDbc (или словарь с ними) -> полные базы cantools; остальное без изменений."""
+    if isinstance(df_dbc, LazyDbc):
+        return df_dbc.load()
+    if isinstance(df_dbc, dict) and any(isinstance(db, LazyDbc) for db in df_dbc.values()):
+        return {name: db.load() if isinstance(db, LazyDbc) else db for name, db in df_dbc.items()}
+    return df_dbc
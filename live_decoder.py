@@ -0,0 +1,175 @@
+import time
+import argparse
+import threading
+from collections import deque
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import can
+import cantools
+import cantools.database
+
+import test_libs as tl
+from frame_ids import EXTENDED_FLAG, frame_key
+
+
+class DecoderIndex:
+    """Индекс frame_id -> (имя сообщения, готовая функция декодирования).
+
+    Строится один раз по загруженным DBC; на каждый кадр — один поиск в dict.
+    При совпадении ID в нескольких файлах используется первый, остальные
+    попадают в conflicts.
+    """
+
+    def __init__(self, df_dbc: Union[cantools.database.can.database.Database, Dict], decode_choices: bool = False):
+        df_dbc = tl.as_dbc_dict(df_dbc, full=True)
+        self.decoders = {}
+        self.conflicts = []
+        for filename, db in df_dbc.items():
+            for message in db.messages:
+                key = frame_key(message.frame_id, message.is_extended_frame)
+                if key in self.decoders:
+                    self.conflicts.append((filename, message.name, message.frame_id))
+                    continue
+                self.decoders[key] = (
+                    message.name,
+                    partial(message.decode, decode_choices=decode_choices, allow_truncated=True),
+                )
+
+    def __len__(self):
+        return len(self.decoders)
+
+    def get(self, frame_id: int, is_extended: bool = False):
+        return self.decoders.get(frame_key(frame_id, is_extended))
+
+
+class LiveDecoder:
+    """Приём кадров с шины python-can в отдельном потоке и пакетное декодирование.
+
+    Поток чтения только складывает кадры в ограниченную очередь; если
+    потребитель не успевает и очередь полна, кадр считается потерянным (dropped).
+    """
+
+    def __init__(self, bus: can.BusABC, index: DecoderIndex, batch_size: int = 256, queue_size: int = 65536):
+        self.bus = bus
+        self.index = index
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.frames = 0
+        self.decoded = 0
+        self.unknown = 0
+        self.errors = 0
+        self.dropped = 0
+        self._queue = deque()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = None
+
+    def _read(self):
+        recv = self.bus.recv
+        queue = self._queue
+        while not self._stop.is_set():
+            frame = recv(timeout=0.1)
+            if frame is None:
+                continue
+            if len(queue) >= self.queue_size:
+                self.dropped += 1
+                continue
+            queue.append(frame)
+
+    def start(self):
+        self._stop.clear()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._read, name="can-reader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> List[Tuple[float, str, Dict]]:
+        """Декодирование до batch_size кадров из очереди: [(timestamp, имя, сигналы)]."""
+        queue = self._queue
+        decoders = self.index.decoders
+        batch = []
+        for _ in range(min(self.batch_size, len(queue))):
+            frame = queue.popleft()
+            self.frames += 1
+            if frame.is_error_frame or frame.is_remote_frame:
+                continue
+            key = frame.arbitration_id | EXTENDED_FLAG if frame.is_extended_id else frame.arbitration_id
+            entry = decoders.get(key)
+            if entry is None:
+                self.unknown += 1
+                continue
+            try:
+                batch.append((frame.timestamp, entry[0], entry[1](frame.data)))
+                self.decoded += 1
+            except Exception:
+                self.errors += 1
+        return batch
+
+    def run(
+        self,
+        duration: Optional[float] = None,
+        max_frames: Optional[int] = None,
+        on_batch: Callable[[List], None] = None,
+    ):
+        self.start()
+        try:
+            deadline = time.perf_counter() + duration if duration else None
+            while True:
+                batch = self.poll()
+                if batch and on_batch is not None:
+                    on_batch(batch)
+                if max_frames is not None and self.frames >= max_frames:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if not batch and not self._queue:
+                    time.sleep(0.001)
+        finally:
+            self.stop()
+        # Дочитываем то, что успело попасть в очередь
+        while self._queue:
+            batch = self.poll()
+            if batch and on_batch is not None:
+                on_batch(batch)
+        return self.stats()
+
+    def stats(self) -> Dict:
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "frames": self.frames,
+            "decoded": self.decoded,
+            "unknown": self.unknown,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "queued": len(self._queue),
+            "seconds": elapsed,
+            "fps": self.frames / elapsed if elapsed else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Декодирование кадров с CAN-шины по DBC")
+    parser.add_argument("dbc", nargs="+")
+    parser.add_argument("--interface", default="socketcan")
+    parser.add_argument("--channel", default="vcan0")
+    parser.add_argument("--fd", action="store_true")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--print", dest="print_frames", action="store_true")
+    args = parser.parse_args()
+
+    dbc_data = tl.read_dbc(args.dbc)
+    index = DecoderIndex(dbc_data)
+    with can.Bus(interface=args.interface, channel=args.channel, fd=args.fd) as bus:
+        decoder = LiveDecoder(bus, index)
+        on_batch = (lambda batch: [print(row) for row in batch]) if args.print_frames else None
+        print(decoder.run(duration=args.duration, on_batch=on_batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,16 @@ import logging
 import cantools.database
 import pandas as pd
 import pprint
-import deepdiff
+import argparse
+from contextlib import nullcontext
 from typing import Union, List
 from pyvis.network import Network
+import matrix_loader
+import check_engine
+import graph_lod
+import profiling
+import report
+import test_libs as tl
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -16,88 +23,39 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def read_files(file_pathX: Union[str, List[str]]) -> List[List]:
+def read_files(file_pathX: Union[str, List[str]], columns="default") -> List[List]:
     if os.path.splitext(file_pathX)[1] == ".dbc":
-        db = cantools.database.load_file(file_pathX)
+        with profiling.span("read_files.dbc") as span:
+            db = cantools.database.load_file(file_pathX)
+            span.count(len(db.messages))
         return db
     elif os.path.splitext(file_pathX)[1] == ".xlsx":
-        if "Matrix" in pd.ExcelFile(file_pathX).sheet_names:
-            df = pd.read_excel(file_pathX, sheet_name="Matrix", keep_default_na=True)
-        else:
-            df = pd.read_excel(file_pathX, sheet_name="RouteTable", keep_default_na=False)
+        with profiling.span("read_files.xlsx") as span:
+            df = matrix_loader.read_matrix(file_pathX, columns=columns)
+            span.count(len(df))
         return df
 
 def normalize_hex(hex_str):
     return f"0x{int(hex_str, 16):03X}"
 
 def checkSignalsMessages(
-    dfx: pd.DataFrame, dfdbc: cantools.database.can.database.Database, dfRM: pd.DataFrame
-):
-    dfRoutTable = {
-        dfRM["Unnamed: 1"].tolist()[i]: normalize_hex(dfRM["Unnamed: 2"].tolist()[i])
-        for i in range(len(dfRM["Unnamed: 2"].tolist()))
-        if dfRM["Unnamed: 1"].tolist()[i] not in ["nan", "Message Name", ""]
-    }
-    
-    dfDBC = {
-        message.name: normalize_hex(f"0x{message.frame_id:X}")
-        for message in dfdbc.messages
-    }
-
-    common_messages = set(dfDBC.keys()) & set(dfRoutTable.keys())
-
-    logger.info("===START CHECKING===")
-
-    for msg in common_messages:
-        if dfDBC[msg] != dfRoutTable[msg]:
-            logger.warning(f"ID mismatch: {msg} (DBC={dfDBC[msg]}, RouteTable={dfRoutTable[msg]})")
-
-    diff = deepdiff.DeepDiff(dfDBC, dfRoutTable)
-    for key, val in diff.items():
-        key = str(key).replace("_", " ")
-        for i in val:
-            logger.info(f"{key} : {i}")
-
-    messagesX = set(dfx["Msg Name\n报文名称"].tolist()) - {"nan"}
-    messagesDBC = set([message.name for message in dfdbc.messages]) - {"nan"}
-
-    different_messagesX = messagesX - messagesDBC
-    different_messagesDBC = messagesDBC - messagesX
-
-    logger.info("===CHECKING MESSAGES===")
-    logger.info(f"xlsx - dbc (сообщения только в Excel) = {different_messagesX}")
-    logger.info(f"dbc - xlsx (сообщения только в DBC) = {different_messagesDBC}")
-
-    signalsX = set(dfx["Signal Name\n信号名称"].tolist()) - {"nan"}
-    signalsDBC = set()
-    for message in dfdbc.messages:
-        signalsDBC.update(signal.name for signal in message.signals)
-
-    different_signalsX = signalsX - signalsDBC
-    different_signalsDBC = signalsDBC - signalsX
-
-    logger.info("===CHECKING SIGNALS===")
-    logger.info(f"xlsx - dbc (сигналы только в Excel) = {different_signalsX}")
-    logger.info(f"dbc - xlsx (сигналы только в DBC) = {different_signalsDBC}")
-
-
-def createGraph(dfdbc: cantools.database.can.database.Database):
+    dfx: pd.DataFrame,
+    dfdbc: cantools.database.can.database.Database,
+    dfRM: pd.DataFrame,
+    log: bool = True,
+) -> check_engine.CheckResult:
+    with profiling.span("checkSignalsMessages", items=len(dfx)):
+        result = check_engine.run_check(dfx, dfdbc, dfRM)
+    if log:
+        check_engine.log_result(result, logger)
+    return result
+
+
+@profiling.profiled("createGraph")
+def createGraph(dfdbc: cantools.database.can.database.Database, lazy: bool = False):
     net = Network(height="1000px", width="100%", heading="CAN Network Visualization")
 
-    net.set_options(
-        """
-    {
-        "configure": {
-            "enabled": true
-        },
-        "nodes": {
-            "font": {
-                "size": 12
-            }
-        }
-    }
-    """
-    )
+    net.set_options(graph_lod.graph_options(lazy))
 
     net.add_node(
         "CAN_Network",
@@ -108,22 +66,15 @@ def createGraph(dfdbc: cantools.database.can.database.Database):
         size=25,
     )
 
+    lod = graph_lod.LodPayload(signal_color="#34A853") if lazy else None
+
     message_counter = 0
     signal_counter = 10000
 
     for message in dfdbc.messages:
         message_counter += 1
         message_id = f"msg_{message_counter}"
-        info = f"""
-        Name message: {message.name}
-        Sender: {message.senders}
-        Recievers: {message.receivers}
-        Send type: {message.send_type}
-        Cycle type: {message.cycle_time}
-        ID: 0x{message.frame_id:X}
-        Length: {message.length} bytes
-        Signals: {len(message.signals)}
-        """
+        info = None if lazy else graph_lod.message_tooltip(message)
 
         net.add_node(
             message_id,
@@ -136,34 +87,18 @@ def createGraph(dfdbc: cantools.database.can.database.Database):
 
         net.add_edge("CAN_Network", message_id)
 
-        def format_choices(choices):
-            if not choices:
-                return "None"
-            return "".join([f"0x{int(k):X}: {v} " for k, v in choices.items()])
+        if lazy:
+            signal_ids = []
+            for _ in message.signals:
+                signal_counter += 1
+                signal_ids.append(f"sig_{signal_counter}")
+            lod.add_message(message_id, message, signal_ids)
+            continue
 
         for signal in message.signals:
             signal_counter += 1
             signal_id = f"sig_{signal_counter}"
-            choices_str = format_choices(
-                signal.choices if hasattr(signal, "choices") else None
-            )
-            info = f"""
-                Name signal: {signal.name}
-                Recievers: {signal.receivers}
-                Byte order: {signal.byte_order}
-                Cycle type: {message.cycle_time}
-                Start bit: {signal.start}
-                Min value: {signal.minimum}
-                Max value: {signal.maximum}
-                Signal Value Description: {choices_str}
-                Initianal value: {signal.raw_initial if signal.raw_initial != None else 0}
-                Invalid value: {signal.raw_invalid}
-                Scale: {signal.scale}
-                Offset: {signal.offset}
-                Description: {signal.comment}
-                Lenght: {signal.length} bit
-                Unit: {signal.unit}
-                """
+            info = graph_lod.signal_tooltip(message, signal)
 
             net.add_node(
                 signal_id,
@@ -176,7 +111,8 @@ def createGraph(dfdbc: cantools.database.can.database.Database):
 
             net.add_edge(message_id, signal_id)
 
-    html = net.generate_html()
+    with profiling.span("createGraph.html", items=len(net.nodes)):
+        html = net.generate_html()
 
     js_code = """
     <div style="position: absolute; top: 10px; left: 10px; z-index: 1000; background: white; padding: 5px; border-radius: 5px;">
@@ -200,6 +136,8 @@ def createGraph(dfdbc: cantools.database.can.database.Database):
     """
 
     html = html.replace("</body>", js_code + "</body>")
+    if lazy:
+        html = lod.inject(html)
 
     with open("graph.html", "w", encoding="utf-8") as f:
         f.write(html)
@@ -211,9 +149,28 @@ if __name__ == "__main__":
     pathX = "C:\\Users\\79245\\Desktop\\Files ATOM\\CAN Matrix\\1. Body Domain\\Domain Matrix\\7.0.0\\ATOM_CAN_Matrix_BD_V7.0.0_20250208.xlsx"
     pathDBC = "C:\\Users\\79245\\Desktop\\Files ATOM\\CAN Matrix\\1. Body Domain\\Domain Matrix\\7.0.0\\ATOM_CAN_Matrix_BD_V7.0.0_20250208.dbc"
     pathRM = "C:\\projects\\ATOM\\CANChecker\\RoutingMAP-CGW_V5.1.0_20250417.xlsx"
-    dfX = read_files(pathX)
-    dfDBC = read_files(pathDBC)
-    dfRM = read_files(pathRM)
-    # net = createGraph(dfDBC)
-    # net.show(name="graph.html", notebook=False)
-    checkSignalsMessages(dfX, dfDBC, dfRM)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matrix", default=pathX)
+    parser.add_argument("--dbc", default=pathDBC)
+    parser.add_argument("--route", default=pathRM)
+    parser.add_argument("--profile", help="записать замеры этапов в JSON")
+    parser.add_argument("--no-memory", action="store_true", help="не считать пик памяти (быстрее)")
+    parser.add_argument("--report", help="записать отчёт о проверке (.html или .pdf)")
+    args = parser.parse_args()
+
+    with profiling.collect(memory=not args.no_memory) if args.profile else nullcontext() as profile:
+        dfX = read_files(args.matrix)
+        dfDBC = read_files(args.dbc)
+        dfRM = read_files(args.route)
+        # net = createGraph(dfDBC)
+        # net.show(name="graph.html", notebook=False)
+        result = checkSignalsMessages(dfX, dfDBC, dfRM)
+        if args.report:
+            with profiling.span("report"):
+                report.write_report(
+                    args.report, result, tl.getSignalsDetailed(dfDBC),
+                    sources={"matrix": args.matrix, "dbc": args.dbc, "route": args.route},
+                )
+    if args.profile:
+        profile.dump(args.profile)
+        logger.info(f"Profile written to {args.profile}")
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import logging
+import argparse
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional
+
+import cantools
+import cantools.database
+import pandas as pd
+
+import dbc_cache
+import keyed_diff
+import matrix_loader
+from frame_ids import frame_key
+from keyed_diff import ADDED, REMOVED, CHANGED
+from matrix_loader import MSG_NAME_COL, SIGNAL_NAME_COL, SIGNAL_ATTRIBUTE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_FIELDS = ["name", "id", "length", "is_extended", "is_fd", "cycle_time", "send_type", "senders", "comment"]
+SIGNAL_FIELDS = [
+    "start_bit", "length", "byte order", "is_signed", "scale", "offset", "min", "max", "unit",
+    "init", "invalid", "recievers", "choices", "description", "multiplexer_ids",
+]
+
+
+class MatrixChange(NamedTuple):
+    kind: str
+    message: str
+    signal: Optional[str] = None
+    field: Optional[str] = None
+    old: Any = None
+    new: Any = None
+
+
+class MessageEntry(NamedTuple):
+    key: tuple
+    name: str
+    id: Optional[str]
+    fingerprint: int
+    attributes: Dict
+    signals: Callable[[], Dict[str, Dict]]
+
+
+def _message_values(message: cantools.database.can.Message) -> tuple:
+    return (
+        message.name,
+        f"0x{message.frame_id:X}",
+        message.length,
+        message.is_extended_frame,
+        message.is_fd,
+        message.cycle_time,
+        message.send_type,
+        tuple(message.senders or ()),
+        message.comment,
+    )
+
+
+def _signal_values(signal: cantools.database.can.Signal) -> tuple:
+    choices = tuple((int(value), str(name)) for value, name in signal.choices.items()) if signal.choices else None
+    return (
+        signal.start,
+        signal.length,
+        signal.byte_order,
+        signal.is_signed,
+        signal.scale,
+        signal.offset,
+        signal.minimum,
+        signal.maximum,
+        signal.unit,
+        signal.raw_initial,
+        signal.raw_invalid,
+        tuple(sorted(signal.receivers)),
+        choices,
+        signal.comment,
+        tuple(signal.multiplexer_ids or ()),
+    )
+
+
+def dbc_entries(db: cantools.database.can.database.Database) -> Iterator[MessageEntry]:
+    """Сообщения DBC в порядке frame ID; словари сигналов строятся только по запросу."""
+    occurrences = defaultdict(int)
+    messages = sorted(db.messages, key=lambda message: (frame_key(message.frame_id, message.is_extended_frame), message.name))
+    for message in messages:
+        key = frame_key(message.frame_id, message.is_extended_frame)
+        index = occurrences[key]
+        occurrences[key] += 1
+        values = _message_values(message)
+        fingerprint = hash((values, tuple((signal.name, _signal_values(signal)) for signal in message.signals)))
+        yield MessageEntry(
+            (key, index),
+            message.name,
+            values[1],
+            fingerprint,
+            dict(zip(MESSAGE_FIELDS, values)),
+            lambda message=message: {
+                signal.name: dict(zip(SIGNAL_FIELDS, _signal_values(signal))) for signal in message.signals
+            },
+        )
+
+
+def excel_entries(df: pd.DataFrame, id_column: Optional[str] = None) -> Iterator[MessageEntry]:
+    """Сообщения листа Matrix: по ID из id_column, если он задан, иначе по имени.
+
+    Отпечаток сообщения — сумма хэшей его строк, посчитанных одним вызовом
+    для всего листа, поэтому от порядка строк он не зависит.
+    """
+    df = df[df[MSG_NAME_COL].notna()].reset_index(drop=True)
+    fields = {name: column for name, column in SIGNAL_ATTRIBUTE_COLUMNS.items() if column in df.columns}
+    values = df[[SIGNAL_NAME_COL] + list(fields.values())].astype(object).fillna("").astype(str)
+    values.columns = ["signal"] + list(fields)
+    row_hash = pd.util.hash_pandas_object(values, index=False)
+    names = df[MSG_NAME_COL].astype(str)
+    fingerprints = row_hash.groupby(names.to_numpy()).sum()
+    positions = names.groupby(names.to_numpy()).indices
+
+    ids = {}
+    if id_column is not None:
+        first = ~names.duplicated()
+        for name, value in zip(names[first], df.loc[first, id_column]):
+            try:
+                ids[name] = int(str(value).strip(), 16)
+            except ValueError:
+                ids[name] = None
+
+    if ids:
+        order = sorted(positions, key=lambda name: (ids[name] is None, ids[name] or 0, name))
+    else:
+        order = sorted(positions)
+
+    def signals(rows):
+        result = {}
+        for record in values.iloc[rows].to_dict("records"):
+            name = record.pop("signal")
+            result[name] = {field: (value or None) for field, value in record.items()}
+        return result
+
+    for name in order:
+        frame_id = ids.get(name)
+        rows = positions[name]
+        yield MessageEntry(
+            (frame_id is None, frame_id or 0, name) if ids else (name,),
+            name,
+            None if frame_id is None else f"0x{frame_id:X}",
+            int(fingerprints[name]),
+            {"name": name, "id": None if frame_id is None else f"0x{frame_id:X}"} if ids else {},
+            lambda rows=rows: signals(rows),
+        )
+
+
+def _diff_message(old: MessageEntry, new: MessageEntry) -> Iterator[MatrixChange]:
+    for record in keyed_diff.diff_catalogs(old.attributes, new.attributes):
+        yield MatrixChange(CHANGED, new.name, None, record.key, record.old, record.new)
+    for record in keyed_diff.diff_catalogs(old.signals(), new.signals()):
+        if record.kind == CHANGED:
+            for field in keyed_diff.diff_catalogs(record.old, record.new):
+                yield MatrixChange(CHANGED, new.name, record.key, field.key, field.old, field.new)
+        else:
+            yield MatrixChange(record.kind, new.name, record.key)
+
+
+def diff_entries(old: Iterator[MessageEntry], new: Iterator[MessageEntry]) -> Iterator[MatrixChange]:
+    """Слияние двух отсортированных потоков сообщений.
+
+    Сообщения с одинаковым отпечатком пропускаются без сравнения сигналов.
+    """
+    a = next(old, None)
+    b = next(new, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a.key < b.key):
+            yield MatrixChange(REMOVED, a.name, old=a.id)
+            a = next(old, None)
+        elif a is None or b.key < a.key:
+            yield MatrixChange(ADDED, b.name, new=b.id)
+            b = next(new, None)
+        else:
+            if a.fingerprint != b.fingerprint:
+                yield from _diff_message(a, b)
+            a = next(old, None)
+            b = next(new, None)
+
+
+def _entries(path: str, id_column: Optional[str]) -> Iterator[MessageEntry]:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".dbc":
+        return dbc_entries(dbc_cache.load_file(path))
+    if extension == ".xlsx":
+        columns = matrix_loader.MATRIX_COLUMNS + ([id_column] if id_column else [])
+        return excel_entries(matrix_loader.read_matrix(path, columns=columns), id_column)
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+def diff_files(old_path: str, new_path: str, id_column: Optional[str] = None) -> Iterator[MatrixChange]:
+    """Потоковый diff двух версий матрицы (обе DBC или обе Excel)."""
+    old_type = os.path.splitext(old_path)[1].lower()
+    new_type = os.path.splitext(new_path)[1].lower()
+    if old_type != new_type:
+        raise ValueError(f"Cannot diff {old_type} against {new_type}")
+    return diff_entries(_entries(old_path, id_column), _entries(new_path, id_column))
+
+
+def _format(change: MatrixChange) -> str:
+    target = change.message if change.signal is None else f"{change.message}.{change.signal}"
+    if change.field is not None:
+        return f"{change.kind:8} {target} {change.field}: {change.old!r} -> {change.new!r}"
+    value = change.new if change.kind == ADDED else change.old
+    return f"{change.kind:8} {target}" + (f" ({value})" if value else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Разница между двумя версиями CAN-матрицы (DBC или Excel)")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--id-column", help="колонка ID сообщения в листе Matrix (для порядка по frame ID)")
+    parser.add_argument("--format", choices=["text", "jsonl"], default="text")
+    parser.add_argument("--output", help="файл вывода (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    counts = {ADDED: 0, REMOVED: 0, CHANGED: 0}
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for change in diff_files(args.old, args.new, args.id_column):
+            counts[change.kind] += 1
+            if args.format == "jsonl":
+                out.write(json.dumps(change._asdict(), ensure_ascii=False, default=str) + "\n")
+            else:
+                out.write(_format(change) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    logger.info(f"added={counts[ADDED]}, removed={counts[REMOVED]}, changed={counts[CHANGED]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import json
+import logging
+from typing import Iterable, Optional
+
+import pandas as pd
+
+import dbc_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = ".matrix_cache"
+
+MATRIX_SHEET = "Matrix"
+ROUTE_SHEET = "RouteTable"
+
+MSG_NAME_COL = "Msg Name\n报文名称"
+SIGNAL_NAME_COL = "Signal Name\n信号名称"
+ROUTE_NAME_COL = "Unnamed: 1"
+ROUTE_ID_COL = "Unnamed: 2"
+
+# Поля getSignalsDetailed -> заголовки колонок листа Matrix
+SIGNAL_ATTRIBUTE_COLUMNS = {
+    "start_bit": "Start Bit\n起始位",
+    "length": "Bit Length(Bit)\n信号长度",
+    "scale": "Resolution\n精度",
+    "offset": "Offset\n偏移量",
+    "unit": "Unit\n单位",
+    "is_signed": "Data Type\n数据类型",
+    "recievers": "Receiver\n接收方",
+    "byte order": "Byte Order\n排列格式(Intel/Motorola)",
+    "max": "Signal Max. Value(phys)\n物理最大值",
+    "min": "Signal Min. Value(phys)\n物理最小值",
+    "init": "Initial Value(Hex)\n初始值",
+    "invalid": "Invalid Value(Hex)\n无效值",
+    "description": "Signal Description\n信号描述",
+}
+
+MATRIX_COLUMNS = [MSG_NAME_COL, SIGNAL_NAME_COL] + list(SIGNAL_ATTRIBUTE_COLUMNS.values())
+ROUTE_COLUMNS = [ROUTE_NAME_COL, ROUTE_ID_COL]
+
+
+def _cache_path(key: str, columns, cache_dir: str) -> str:
+    if columns == "default":
+        spec = [MATRIX_COLUMNS, ROUTE_COLUMNS]
+    elif columns is None:
+        spec = None
+    else:
+        spec = sorted(columns)
+    signature = dbc_cache.content_hash(json.dumps(spec).encode("utf-8"))[:16]
+    return os.path.join(cache_dir, f"{key}-{signature}.feather")
+
+
+def _pickle_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".pickle"
+
+
+def _read_cached(path: str) -> Optional[pd.DataFrame]:
+    for cached, read in ((path, pd.read_feather), (_pickle_path(path), pd.read_pickle)):
+        if not os.path.exists(cached):
+            continue
+        try:
+            return read(cached)
+        except Exception as e:
+            logger.debug(f"Matrix cache unreadable {cached}: {e}")
+    return None
+
+
+def _write_cached(path: str, df: pd.DataFrame, cache_dir: str):
+    """Feather, а если Arrow не принимает колонку смешанного типа (0 и "0xFF"
+    в одной колонке) или pyarrow нет — pickle рядом, с исходными типами значений."""
+    df = df.reset_index(drop=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        df.to_feather(tmp_path)
+        os.replace(tmp_path, path)
+        return
+    except Exception as e:
+        logger.debug(f"Matrix cache not written as Feather for {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    path = _pickle_path(path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.debug(f"Matrix cache not written for {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def read_matrix(
+    file_path: str,
+    columns: Optional[Iterable[str]] = "default",
+    cache_dir: Optional[str] = CACHE_DIR,
+) -> pd.DataFrame:
+    """Чтение листа Matrix/RouteTable за одно открытие книги, только нужные колонки.
+
+    columns="default" выбирает колонки, которые использует checkSignalsMessages,
+    columns=None читает лист целиком.
+    """
+    with open(file_path, "rb") as f:
+        key = dbc_cache.content_hash(f.read())
+
+    path = _cache_path(key, columns, cache_dir) if cache_dir else None
+    if path:
+        df = _read_cached(path)
+        if df is not None:
+            return df
+
+    with pd.ExcelFile(file_path) as xls:
+        sheet = MATRIX_SHEET if MATRIX_SHEET in xls.sheet_names else ROUTE_SHEET
+        if columns == "default":
+            columns = MATRIX_COLUMNS if sheet == MATRIX_SHEET else ROUTE_COLUMNS
+        wanted = set(columns) if columns is not None else None
+        df = xls.parse(
+            sheet,
+            usecols=(lambda c: c in wanted) if wanted is not None else None,
+            keep_default_na=(sheet == MATRIX_SHEET),
+        )
+
+    if path:
+        _write_cached(path, df, cache_dir)
+    return df
@@ -0,0 +1,175 @@
+import json
+import time
+import threading
+import tracemalloc
+import functools
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Число активных сборов; при нуле span() сразу отдаёт заглушку
+_active = 0
+_memory_users = 0
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class _NullSpan:
+    """Заглушка, которую span() отдаёт при выключенном профилировании."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, items: int):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("profile", "name", "parent", "depth", "items", "start", "wall", "mem_start", "peak", "child_peak")
+
+    def __init__(self, profile: "Profile", name: str, items: Optional[int]):
+        self.profile = profile
+        self.name = name
+        self.items = items
+        self.parent = None
+        self.depth = 0
+        self.wall = 0.0
+        self.peak = None
+        self.child_peak = 0
+
+    def count(self, items: int):
+        self.items = items
+
+    def __enter__(self):
+        stack = self.profile._stack
+        if stack:
+            self.parent = stack[-1].name
+            self.depth = len(stack)
+        stack.append(self)
+        if self.profile.memory:
+            self.mem_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.start
+        profile = self.profile
+        if profile.memory:
+            # reset_peak во вложенных span сбрасывает общий пик, поэтому
+            # пики детей поднимаются к родителю вручную
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            self.peak = peak - self.mem_start
+            tracemalloc.reset_peak()
+        profile._stack.pop()
+        if profile._stack and self.peak is not None:
+            parent = profile._stack[-1]
+            parent.child_peak = max(parent.child_peak, peak)
+        profile.records.append(self)
+        return False
+
+
+class Profile:
+    """Набор замеров одного прогона: время, пик памяти (tracemalloc) и число элементов по этапам.
+
+    Пик памяти считается только для Python-аллокаций (включая NumPy/pandas)
+    и общий на процесс — при параллельных сессиях Streamlit цифры памяти
+    приблизительные, время — точное.
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records: List[Span] = []
+        self._stack: List[Span] = []
+        self.started = time.time()
+        self._origin = time.perf_counter()
+
+    def to_records(self) -> List[Dict]:
+        return [
+            {
+                "stage": span.name,
+                "start_ms": round((span.start - self._origin) * 1000, 3),
+                "parent": span.parent,
+                "depth": span.depth,
+                "wall_ms": round(span.wall * 1000, 3),
+                "peak_mb": None if span.peak is None else round(span.peak / 2 ** 20, 3),
+                "items": span.items,
+            }
+            for span in sorted(self.records, key=lambda span: span.start)
+        ]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            self.to_records(), columns=["stage", "start_ms", "parent", "depth", "wall_ms", "peak_mb", "items"]
+        )
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps({"started": self.started, "stages": self.to_records()}, ensure_ascii=False, **kwargs)
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json(indent=2))
+
+
+def span(name: str, items: Optional[int] = None):
+    """Замер этапа: with profiling.span("read_dbc") as s: ...; s.count(n).
+
+    Без активного collect() возвращает общую заглушку — одна проверка счётчика.
+    """
+    if not _active:
+        return NULL_SPAN
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return NULL_SPAN
+    return Span(profile, name, items)
+
+
+def profiled(name: str) -> Callable:
+    """Декоратор: вся функция — один этап."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current() -> Optional[Profile]:
+    return getattr(_local, "profile", None) if _active else None
+
+
+@contextmanager
+def collect(memory: bool = True):
+    """Включает сбор замеров в текущем потоке и отдаёт Profile."""
+    global _active, _memory_users
+    profile = Profile(memory)
+    previous = getattr(_local, "profile", None)
+    _local.profile = profile
+    with _lock:
+        _active += 1
+        if memory:
+            _memory_users += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+    try:
+        yield profile
+    finally:
+        _local.profile = previous
+        with _lock:
+            _active -= 1
+            if memory:
+                _memory_users -= 1
+                if not _memory_users:
+                    tracemalloc.stop()
@@ -0,0 +1,275 @@
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import jinja2
+
+from check_engine import CheckResult, ATTRIBUTE_MISMATCH_COLUMNS
+
+# Сколько фрагментов шаблона копится перед записью в файл
+CHUNK_ROWS = 1000
+
+SIGNAL_COLUMNS = [
+    "name", "start_bit", "length", "scale", "offset", "unit", "is_signed", "recievers",
+    "byte order", "min", "max", "init", "invalid", "description",
+]
+
+
+class Section(NamedTuple):
+    key: str
+    title: str
+    columns: List[str]
+    count: int
+    rows: Iterable[tuple]
+
+
+def _signal_rows(signals: Dict, multi: bool) -> Iterator[tuple]:
+    files = signals.items() if multi else [("", signals)]
+    for filename, messages in files:
+        for message, records in messages.items():
+            for record in records:
+                row = (message,) + tuple(record.get(column) for column in SIGNAL_COLUMNS)
+                yield (filename,) + row if multi else row
+
+
+def sections(result: CheckResult, signals: Optional[Dict] = None) -> List[Section]:
+    """Разделы отчёта; строки — генераторы, чтобы не держать таблицы целиком."""
+    def names(values):
+        return ((value,) for value in values)
+
+    items = [
+        Section(
+            "id_mismatches", "ID mismatches (DBC vs RouteTable)", ["message", "dbc_id", "route_id"],
+            len(result.id_mismatches),
+            result.id_mismatches[["message", "dbc_id", "route_id"]].itertuples(index=False, name=None),
+        ),
+        Section(
+            "attribute_mismatches", "Signal attribute mismatches (Excel vs DBC)", ATTRIBUTE_MISMATCH_COLUMNS,
+            len(result.attribute_mismatches),
+            result.attribute_mismatches[ATTRIBUTE_MISMATCH_COLUMNS].itertuples(index=False, name=None),
+        ),
+        Section(
+            "route_diff", "RouteTable diff", ["kind", "message", "dbc", "route"],
+            len(result.route_diff),
+            ((record.kind, record.key, record.old, record.new) for record in result.route_diff),
+        ),
+        Section("messages_only_excel", "Messages only in Excel", ["message"],
+                len(result.messages_only_excel), names(result.messages_only_excel)),
+        Section("messages_only_dbc", "Messages only in DBC", ["message"],
+                len(result.messages_only_dbc), names(result.messages_only_dbc)),
+        Section("signals_only_excel", "Signals only in Excel", ["signal"],
+                len(result.signals_only_excel), names(result.signals_only_excel)),
+        Section("signals_only_dbc", "Signals only in DBC", ["signal"],
+                len(result.signals_only_dbc), names(result.signals_only_dbc)),
+    ]
+    if signals:
+        # getSignalsDetailed: {message: [..]} для одной базы или {file: {message: [..]}}
+        multi = not isinstance(next(iter(signals.values())), list)
+        messages = signals.values() if multi else [signals]
+        count = sum(len(records) for file in messages for records in file.values())
+        columns = (["file"] if multi else []) + ["message"] + SIGNAL_COLUMNS
+        items.append(Section("signals", "Signal details", columns, count, _signal_rows(signals, multi)))
+    return items
+
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{{ title }}</title>
+<style>
+body { font-family: Arial, sans-serif; font-size: 13px; margin: 20px; }
+table { border-collapse: collapse; margin-bottom: 24px; }
+th, td { border: 1px solid #ccc; padding: 3px 6px; text-align: left; vertical-align: top; }
+th { background: #862633; color: white; cursor: pointer; position: sticky; top: 0; }
+th.asc::after { content: " \\25B2"; } th.desc::after { content: " \\25BC"; }
+tr:nth-child(even) td { background: #f6f6f6; }
+.ok { color: #2DAC4F; } .fail { color: #C00000; }
+.summary td:last-child { text-align: right; }
+</style>
+</head>
+<body>
+<h1>{{ title }}</h1>
+<p>Generated {{ generated }}</p>
+{% if sources %}<ul>{% for name, path in sources.items() %}<li>{{ name }}: {{ path }}</li>{% endfor %}</ul>{% endif %}
+<h2 class="{{ 'ok' if ok else 'fail' }}">{{ 'OK' if ok else 'Mismatches found' }}</h2>
+<table class="summary">
+<tr><th>Section</th><th>Rows</th></tr>
+{% for section in sections %}<tr><td><a href="#{{ section.key }}">{{ section.title }}</a></td><td>{{ section.count }}</td></tr>
+{% endfor %}</table>
+{% for section in sections %}{% if section.count %}
+<h2 id="{{ section.key }}">{{ section.title }} ({{ section.count }})</h2>
+<table class="sortable">
+<thead><tr>{% for column in section.columns %}<th>{{ column }}</th>{% endfor %}</tr></thead>
+<tbody>
+{% for row in section.rows %}<tr>{% for cell in row %}<td>{{ cell if cell is not none else '' }}</td>{% endfor %}</tr>
+{% endfor %}</tbody>
+</table>
+{% endif %}{% endfor %}
+<script>
+document.querySelectorAll("table.sortable th").forEach(function (th) {
+    th.addEventListener("click", function () {
+        var table = th.closest("table");
+        var body = table.tBodies[0];
+        var index = Array.prototype.indexOf.call(th.parentNode.children, th);
+        var desc = th.classList.contains("asc");
+        th.parentNode.querySelectorAll("th").forEach(function (other) { other.classList.remove("asc", "desc"); });
+        th.classList.add(desc ? "desc" : "asc");
+        var rows = Array.prototype.slice.call(body.rows);
+        var keys = rows.map(function (row) {
+            var text = row.cells[index].textContent;
+            var number = text.trim() === "" ? NaN : Number(text);
+            return [isNaN(number) ? text : number, row];
+        });
+        keys.sort(function (a, b) {
+            var x = a[0], y = b[0];
+            if (typeof x !== typeof y) { x = String(x); y = String(y); }
+            var order = x < y ? -1 : x > y ? 1 : 0;
+            return desc ? -order : order;
+        });
+        var fragment = document.createDocumentFragment();
+        keys.forEach(function (key) { fragment.appendChild(key[1]); });
+        body.appendChild(fragment);
+    });
+});
+</script>
+</body>
+</html>
+"""
+
+_environment = jinja2.Environment(autoescape=True, trim_blocks=False)
+
+
+def write_html(
+    path: str,
+    result: CheckResult,
+    signals: Optional[Dict] = None,
+    title: str = "CAN matrix check report",
+    sources: Optional[Dict[str, str]] = None,
+):
+    """HTML-отчёт: шаблон рендерится потоком и пишется кусками по CHUNK_ROWS фрагментов."""
+    template = _environment.from_string(HTML_TEMPLATE)
+    stream = template.stream(
+        title=title,
+        generated=time.strftime("%Y-%m-%d %H:%M:%S"),
+        sources=sources or {},
+        ok=result.ok,
+        sections=sections(result, signals),
+    )
+    stream.enable_buffering(CHUNK_ROWS)
+    with open(path, "w", encoding="utf-8") as f:
+        stream.dump(f)
+
+
+def write_pdf(
+    path: str,
+    result: CheckResult,
+    signals: Optional[Dict] = None,
+    title: str = "CAN matrix check report",
+    sources: Optional[Dict[str, str]] = None,
+    font_path: Optional[str] = None,
+):
+    """PDF-отчёт через ReportLab (необязательная зависимость).
+
+    Строки рисуются на canvas по мере чтения, без сборки таблиц, но потоковым
+    PDF-путь не является: Canvas держит все готовые страницы (сжатые потоки
+    содержимого) до save(), так что память растёт с числом строк — порядка
+    6 МБ на 10 тыс. и 36 МБ на 100 тыс. строк. Для постоянной памяти на
+    больших результатах — write_html. font_path — TTF со шрифтом для
+    кириллицы/иероглифов (иначе Helvetica).
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+
+    font = "Helvetica"
+    if font_path:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        font = os.path.splitext(os.path.basename(font_path))[0]
+        pdfmetrics.registerFont(TTFont(font, font_path))
+
+    width, height = landscape(A4)
+    margin = 36
+    size = 7
+    line = size + 3
+    pdf = canvas.Canvas(path, pagesize=(width, height), pageCompression=1)
+    pdf.setTitle(title)
+    y = height - margin
+
+    def new_page():
+        nonlocal y
+        pdf.showPage()
+        y = height - margin
+
+    def text(value: str, x: float, font_size: float = size, bold: bool = False):
+        pdf.setFont(font + "-Bold" if bold and font == "Helvetica" else font, font_size)
+        pdf.drawString(x, y, value)
+
+    # Сводка
+    text(title, margin, 16, bold=True)
+    y -= 24
+    text(f"Generated {time.strftime('%Y-%m-%d %H:%M:%S')}", margin, 9)
+    y -= 14
+    for name, source in (sources or {}).items():
+        text(f"{name}: {source}", margin, 9)
+        y -= 12
+    y -= 6
+    text("OK" if result.ok else "Mismatches found", margin, 12, bold=True)
+    y -= 18
+    items = sections(result, signals)
+    for section in items:
+        text(section.title, margin, 10)
+        text(str(section.count), margin + 300, 10)
+        y -= 14
+
+    for section in items:
+        if not section.count:
+            continue
+        new_page()
+        column_width = (width - 2 * margin) / len(section.columns)
+        # Обрезка по числу символов: stringWidth на каждую ячейку слишком дорог
+        max_chars = max(4, int(column_width / (size * 0.5)))
+
+        def header():
+            nonlocal y
+            text(section.title, margin, 11, bold=True)
+            y -= 16
+            for i, column in enumerate(section.columns):
+                text(str(column)[:max_chars], margin + i * column_width, size, bold=True)
+            y -= line
+
+        header()
+        # Один текстовый объект на колонку страницы: drawString на каждую ячейку
+        # создаёт объект и переключает шрифт, что на сотнях тысяч ячеек заметно
+        columns = None
+        for row in section.rows:
+            if y < margin:
+                for column in columns:
+                    pdf.drawText(column)
+                columns = None
+                new_page()
+                header()
+            if columns is None:
+                columns = []
+                for i in range(len(section.columns)):
+                    column = pdf.beginText(margin + i * column_width, y)
+                    column.setFont(font, size, line)
+                    columns.append(column)
+            for column, cell in zip(columns, row):
+                value = "" if cell is None else str(cell).replace("\n", " ")
+                if len(value) > max_chars:
+                    value = value[:max_chars - 1] + "~"
+                column.textLine(value)
+            y -= line
+        for column in columns or ():
+            pdf.drawText(column)
+    pdf.save()
+
+
+def write_report(path: str, result: CheckResult, signals: Optional[Dict] = None, **kwargs):
+    """HTML или PDF по расширению файла."""
+    if os.path.splitext(path)[1].lower() == ".pdf":
+        write_pdf(path, result, signals, **kwargs)
+    else:
+        write_html(path, result, signals, **kwargs)
@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import time
+from operator import attrgetter
+from typing import Callable, Dict, List, Union
+
+import cantools
+import cantools.database
+import pandas as pd
+
+import test_libs as tl
+
+TARGETS = ("message", "signal")
+VIOLATION_COLUMNS = ["rule", "severity", "file", "message", "signal", "field", "value", "text"]
+
+
+class RuleError(Exception):
+    pass
+
+
+class CompiledRule:
+    """Правило, скомпилированное в один предикат над значением поля."""
+
+    def __init__(self, rule: Dict):
+        self.id = rule.get("id") or rule.get("name")
+        if not self.id:
+            raise RuleError(f"Rule without id: {rule}")
+        self.target = rule.get("target", "signal")
+        if self.target not in TARGETS:
+            raise RuleError(f"Rule {self.id}: unknown target {self.target!r}")
+        self.field = rule.get("field", "name")
+        self.severity = rule.get("severity", "error")
+        self.text = rule.get("message", "")
+        self._get = attrgetter(self.field)
+        self._where = [
+            (attrgetter(field), re.compile(pattern))
+            for field, pattern in (rule.get("where") or {}).items()
+        ]
+        self._checks = self._compile_checks(rule)
+        if not self._checks:
+            raise RuleError(f"Rule {self.id}: nothing to check")
+
+    def _compile_checks(self, rule: Dict) -> List[Callable]:
+        checks = []
+        if rule.get("required"):
+            checks.append(lambda value: value is not None and value != "")
+        if "pattern" in rule:
+            regex = re.compile(rule["pattern"])
+            checks.append(lambda value: value is not None and regex.search(str(value)) is not None)
+        if "min" in rule:
+            low = rule["min"]
+            checks.append(lambda value: value is None or value >= low)
+        if "max" in rule:
+            high = rule["max"]
+            checks.append(lambda value: value is None or value <= high)
+        if "in" in rule:
+            allowed = frozenset(rule["in"])
+            checks.append(lambda value: value in allowed)
+        if "not_in" in rule:
+            forbidden = frozenset(rule["not_in"])
+            checks.append(lambda value: value not in forbidden)
+        return checks
+
+    def applies(self, obj) -> bool:
+        for get, regex in self._where:
+            if regex.search(str(get(obj))) is None:
+                return False
+        return True
+
+    def check(self, obj):
+        """None если правило выполнено, иначе проверенное значение."""
+        if self._where and not self.applies(obj):
+            return None
+        value = self._get(obj)
+        for check in self._checks:
+            try:
+                passed = check(value)
+            except TypeError:
+                passed = False
+            if not passed:
+                return (value,)
+        return None
+
+
+class RuleSet:
+    """Набор правил из YAML/JSON, проверяемых за один проход по всем DBC.
+
+    Формат файла:
+        rules:
+          - id: signal-name
+            target: signal          # signal | message
+            field: name             # атрибут cantools Signal/Message
+            pattern: "^[A-Z][A-Za-z0-9_]*$"
+          - id: cycle-time
+            target: message
+            field: cycle_time
+            min: 10
+            max: 1000
+            where: {name: "^(?!Diag)"}
+    Поддерживаются проверки required, pattern, min, max, in, not_in.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.rules = [CompiledRule(rule) for rule in rules]
+        self.message_rules = [rule for rule in self.rules if rule.target == "message"]
+        self.signal_rules = [rule for rule in self.rules if rule.target == "signal"]
+        self.timings = {}
+        self.counts = {}
+
+    @classmethod
+    def from_dict(cls, data: Union[Dict, List]) -> "RuleSet":
+        if isinstance(data, dict):
+            data = data.get("rules", [])
+        return cls(data)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleSet":
+        with open(path, "r", encoding="utf-8") as f:
+            if os.path.splitext(path)[1] in (".yaml", ".yml"):
+                import yaml
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+        return cls.from_dict(data or {})
+
+    def _run(self, rules, obj, timing: bool):
+        for rule in rules:
+            if timing:
+                start = time.perf_counter()
+                failed = rule.check(obj)
+                self.timings[rule.id] += time.perf_counter() - start
+            else:
+                failed = rule.check(obj)
+            self.counts[rule.id] += 1
+            if failed is not None:
+                yield rule, failed[0]
+
+    def evaluate(
+        self,
+        df_dbc: Union[cantools.database.can.database.Database, Dict],
+        timing: bool = False,
+    ) -> pd.DataFrame:
+        """Проверка одной базы или dict {имя файла: база}, как из test_libs.read_dbc."""
+        df_dbc = tl.as_dbc_dict(df_dbc)
+
+        self.timings = {rule.id: 0.0 for rule in self.rules}
+        self.counts = {rule.id: 0 for rule in self.rules}
+        rows = []
+        for filename, db in df_dbc.items():
+            for message in db.messages:
+                for rule, value in self._run(self.message_rules, message, timing):
+                    rows.append((rule.id, rule.severity, filename, message.name, None, rule.field, value, rule.text))
+                if not self.signal_rules:
+                    continue
+                for signal in message.signals:
+                    for rule, value in self._run(self.signal_rules, signal, timing):
+                        rows.append((rule.id, rule.severity, filename, message.name, signal.name, rule.field, value, rule.text))
+        return pd.DataFrame(rows, columns=VIOLATION_COLUMNS)
+
+    def timing_report(self) -> pd.DataFrame:
+        """Время по правилам (после evaluate(timing=True)), самые дорогие сверху."""
+        report = pd.DataFrame({
+            "rule": list(self.timings.keys()),
+            "seconds": list(self.timings.values()),
+            "evaluations": [self.counts.get(rule, 0) for rule in self.timings],
+        })
+        return report.sort_values("seconds", ascending=False, ignore_index=True)
+
+
+def load_rules(path: str) -> RuleSet:
+    return RuleSet.from_file(path)
@@ -0,0 +1,270 @@
+import sys
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import cantools
+import cantools.database
+import numpy as np
+import pandas as pd
+
+import catalog
+import dbc_cache
+
+_STORES = OrderedDict()
+_STORES_SIZE = 32
+_lock = threading.Lock()
+
+# Разбор без LRU в памяти: после построения хранилища граф cantools не держится,
+# а pickle на диске ускоряет повторный разбор (database())
+_parser = dbc_cache.DbcCache(max_entries=0)
+
+# Биты number_flags: исходное значение было int, а не float (для точного str() в подсказках)
+_MIN, _MAX, _INITIAL, _INVALID, _SCALE, _OFFSET = (1 << bit for bit in range(6))
+
+
+def _number(value, flag: int, flags: int):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return np.nan, flags
+    if isinstance(value, int) and not isinstance(value, bool):
+        flags |= flag
+    return float(value), flags
+
+
+class SignalStore:
+    """Неизменяемое колоночное представление одной DBC.
+
+    Сообщения и сигналы хранятся массивами (struct-of-arrays), строки и
+    кортежи получателей интернированы, так что одинаковые значения в памяти
+    одни. messages/get_message_by_name отдают лёгкие представления с теми же
+    атрибутами, что у объектов cantools, поэтому граф, каталог и индекс
+    работают с хранилищем без изменений.
+    """
+
+    __slots__ = (
+        "key", "_source", "nodes", "buses", "message_index",
+        "message_names", "frame_ids", "is_extended", "is_fd", "lengths", "cycle_times",
+        "send_types", "senders", "message_comments", "signal_offsets",
+        "signal_names", "starts", "signal_lengths", "scales", "offsets", "minimums", "maximums",
+        "initials", "invalids", "number_flags", "units", "is_signed", "big_endian", "receivers",
+        "signal_comments", "choices",
+    )
+
+    def __init__(self, db: cantools.database.can.database.Database, key: str = None, source: bytes = None):
+        tuples = {}
+
+        def intern(value):
+            return sys.intern(value) if isinstance(value, str) else value
+
+        def intern_tuple(values):
+            value = tuple(intern(item) for item in values or ())
+            return tuples.setdefault(value, value)
+
+        self.key = key
+        self._source = zlib.compress(source) if source is not None else None
+        self.nodes = tuple(NodeView(intern(node.name)) for node in db.nodes)
+        self.buses = tuple(db.buses)
+
+        messages = db.messages
+        self.message_names = [intern(message.name) for message in messages]
+        self.message_index = {name: i for i, name in enumerate(self.message_names)}
+        self.frame_ids = np.array([message.frame_id for message in messages], dtype=np.uint32)
+        self.is_extended = np.array([message.is_extended_frame for message in messages], dtype=bool)
+        self.is_fd = np.array([message.is_fd for message in messages], dtype=bool)
+        self.lengths = np.array([message.length for message in messages], dtype=np.uint8)
+        self.cycle_times = np.array(
+            [-1 if message.cycle_time is None else message.cycle_time for message in messages], dtype=np.int32
+        )
+        self.send_types = [intern(message.send_type) for message in messages]
+        self.senders = [intern_tuple(message.senders) for message in messages]
+        self.message_comments = [intern(message.comment) for message in messages]
+        self.signal_offsets = np.cumsum([0] + [len(message.signals) for message in messages], dtype=np.int64)
+
+        signals = [signal for message in messages for signal in message.signals]
+        count = len(signals)
+        self.signal_names = [intern(signal.name) for signal in signals]
+        self.starts = np.array([signal.start for signal in signals], dtype=np.int16)
+        self.signal_lengths = np.array([signal.length for signal in signals], dtype=np.int16)
+        self.units = [intern(signal.unit) for signal in signals]
+        self.is_signed = np.array([signal.is_signed for signal in signals], dtype=bool)
+        self.big_endian = np.array([signal.byte_order == "big_endian" for signal in signals], dtype=bool)
+        self.receivers = [intern_tuple(signal.receivers) for signal in signals]
+        self.signal_comments = [intern(signal.comment) for signal in signals]
+        self.choices = [
+            tuple((int(value), intern(str(name))) for value, name in signal.choices.items()) if signal.choices else None
+            for signal in signals
+        ]
+
+        numbers = np.empty((6, count), dtype=np.float64)
+        self.number_flags = np.zeros(count, dtype=np.uint8)
+        for i, signal in enumerate(signals):
+            flags = 0
+            numbers[0, i], flags = _number(signal.minimum, _MIN, flags)
+            numbers[1, i], flags = _number(signal.maximum, _MAX, flags)
+            numbers[2, i], flags = _number(signal.raw_initial, _INITIAL, flags)
+            numbers[3, i], flags = _number(signal.raw_invalid, _INVALID, flags)
+            numbers[4, i], flags = _number(signal.scale, _SCALE, flags)
+            numbers[5, i], flags = _number(signal.offset, _OFFSET, flags)
+            self.number_flags[i] = flags
+        self.minimums, self.maximums, self.initials, self.invalids, self.scales, self.offsets = numbers
+
+    def _value(self, values: np.ndarray, flag: int, i: int):
+        value = values[i]
+        if np.isnan(value):
+            return None
+        return int(value) if self.number_flags[i] & flag else float(value)
+
+    @property
+    def messages(self) -> List["MessageView"]:
+        return [MessageView(self, i) for i in range(len(self.message_names))]
+
+    def get_message_by_name(self, name: str) -> "MessageView":
+        return MessageView(self, self.message_index[name])
+
+    @property
+    def message_count(self) -> int:
+        return len(self.message_names)
+
+    @property
+    def signal_count(self) -> int:
+        return len(self.signal_names)
+
+    def database(self) -> cantools.database.can.database.Database:
+        """Полная база cantools (для редактирования).
+
+        Разбор идёт через _parser без LRU в памяти (повторно — из pickle на диске),
+        так что граф живёт, пока он нужен вызывающему.
+        """
+        if self._source is None:
+            raise ValueError("Store was built without source bytes")
+        data = zlib.decompress(self._source)
+        return _parser.get(data, lambda: _load(data))
+
+    def messages_table(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "Message": pd.Series(self.message_names, dtype=object),
+            "ID": pd.Series([f"0x{frame_id:X}" for frame_id in self.frame_ids.tolist()], dtype=object),
+            "Length": self.lengths.astype(np.int16),
+            "Signals Count": np.diff(self.signal_offsets).astype(np.int32),
+        })
+
+    def signals_table(self) -> pd.DataFrame:
+        owners = np.repeat(np.arange(len(self.message_names)), np.diff(self.signal_offsets))
+        names = np.array(self.message_names, dtype=object)
+        return pd.DataFrame({
+            "Signal": pd.Series(self.signal_names, dtype=object),
+            "Message": pd.Series(names[owners], dtype=object),
+            "Start Bit": self.starts.astype(np.int32),
+            "Length": self.signal_lengths.astype(np.int32),
+        })
+
+
+class NodeView:
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class MessageView:
+    """Сообщение хранилища с атрибутами cantools.Message (только чтение)."""
+
+    __slots__ = ("_store", "_i")
+
+    def __init__(self, store: SignalStore, i: int):
+        self._store = store
+        self._i = i
+
+    name = property(lambda self: self._store.message_names[self._i])
+    frame_id = property(lambda self: int(self._store.frame_ids[self._i]))
+    is_extended_frame = property(lambda self: bool(self._store.is_extended[self._i]))
+    is_fd = property(lambda self: bool(self._store.is_fd[self._i]))
+    length = property(lambda self: int(self._store.lengths[self._i]))
+    send_type = property(lambda self: self._store.send_types[self._i])
+    senders = property(lambda self: list(self._store.senders[self._i]))
+    comment = property(lambda self: self._store.message_comments[self._i])
+
+    @property
+    def cycle_time(self) -> Optional[int]:
+        value = int(self._store.cycle_times[self._i])
+        return None if value < 0 else value
+
+    @property
+    def signals(self) -> List["SignalView"]:
+        start, end = self._store.signal_offsets[self._i], self._store.signal_offsets[self._i + 1]
+        return [SignalView(self._store, j) for j in range(int(start), int(end))]
+
+    @property
+    def receivers(self) -> set:
+        start, end = self._store.signal_offsets[self._i], self._store.signal_offsets[self._i + 1]
+        return {receiver for j in range(int(start), int(end)) for receiver in self._store.receivers[j]}
+
+
+class SignalView:
+    """Сигнал хранилища с атрибутами cantools.Signal (только чтение)."""
+
+    __slots__ = ("_store", "_i")
+
+    def __init__(self, store: SignalStore, i: int):
+        self._store = store
+        self._i = i
+
+    name = property(lambda self: self._store.signal_names[self._i])
+    start = property(lambda self: int(self._store.starts[self._i]))
+    length = property(lambda self: int(self._store.signal_lengths[self._i]))
+    unit = property(lambda self: self._store.units[self._i])
+    is_signed = property(lambda self: bool(self._store.is_signed[self._i]))
+    byte_order = property(lambda self: "big_endian" if self._store.big_endian[self._i] else "little_endian")
+    receivers = property(lambda self: list(self._store.receivers[self._i]))
+    comment = property(lambda self: self._store.signal_comments[self._i])
+    minimum = property(lambda self: self._store._value(self._store.minimums, _MIN, self._i))
+    maximum = property(lambda self: self._store._value(self._store.maximums, _MAX, self._i))
+    raw_initial = property(lambda self: self._store._value(self._store.initials, _INITIAL, self._i))
+    raw_invalid = property(lambda self: self._store._value(self._store.invalids, _INVALID, self._i))
+    scale = property(lambda self: self._store._value(self._store.scales, _SCALE, self._i))
+    offset = property(lambda self: self._store._value(self._store.offsets, _OFFSET, self._i))
+
+    @property
+    def choices(self) -> Optional[Dict[int, str]]:
+        choices = self._store.choices[self._i]
+        return dict(choices) if choices is not None else None
+
+
+def _load(data: bytes, encoding: str = "cp1252") -> cantools.database.can.database.Database:
+    return cantools.database.load_string(data.decode(encoding), database_format="dbc")
+
+
+def load_bytes(data: bytes, encoding: str = "cp1252") -> SignalStore:
+    """Хранилище для содержимого DBC; одинаковые файлы всех сессий делят один экземпляр."""
+    key = dbc_cache.content_hash(data)
+    with _lock:
+        store = _STORES.get(key)
+        if store is not None:
+            _STORES.move_to_end(key)
+            return store
+    db = _parser.get(data, lambda: _load(data, encoding))
+    store = SignalStore(db, key, data)
+    with _lock:
+        # Параллельная сессия могла успеть первой — берём её экземпляр
+        store = _STORES.setdefault(key, store)
+        _STORES.move_to_end(key)
+        while len(_STORES) > _STORES_SIZE:
+            _STORES.popitem(last=False)
+    return store
+
+
+def messages_table(stores: Dict[str, SignalStore], name: Optional[str] = None) -> pd.DataFrame:
+    """Таблица сообщений в формате catalog.Catalog.messages_table."""
+    selected = [stores[name]] if name is not None else list(stores.values())
+    if not selected:
+        return pd.DataFrame(columns=list(catalog.MESSAGE_DISPLAY.values()))
+    return pd.concat([store.messages_table() for store in selected], ignore_index=True)
+
+
+def signals_table(stores: Dict[str, SignalStore], name: Optional[str] = None) -> pd.DataFrame:
+    """Таблица сигналов в формате catalog.Catalog.signals_table."""
+    selected = [stores[name]] if name is not None else list(stores.values())
+    if not selected:
+        return pd.DataFrame(columns=list(catalog.SIGNAL_DISPLAY.values()))
+    return pd.concat([store.signals_table() for store in selected], ignore_index=True)
@@ -1,44 +1,34 @@
 import streamlit as st
-import cantools
-import tempfile
-import os
 import test_libs as tl
-import pandas as pd
+import signal_store
+import graph_lod
+import layout_check
+import dbc_index
+import profiling
 from pyvis.network import Network
-from itertools import combinations
 
 st.set_page_config(layout="wide", page_title="CAN Network Visualizer")
 
 def read_dbc(uploaded_files):
-    """Загрузка DBC-файлов из UploadedFile."""
+    """Загрузка DBC-файлов напрямую из буфера UploadedFile, без временных файлов.
+
+    Возвращает компактные signal_store.SignalStore, общие для всех сессий
+    сервера с одинаковыми файлами.
+    """
     dbs = {}
-    for uploaded_file in uploaded_files:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".dbc") as tmp:
-            tmp.write(uploaded_file.getvalue())
-            tmp_path = tmp.name
-        
-        db = cantools.database.load_file(tmp_path)
-        os.unlink(tmp_path)
-        dbs[uploaded_file.name] = db
+    with profiling.span("read_dbc", items=len(uploaded_files)):
+        for uploaded_file in uploaded_files:
+            dbs[uploaded_file.name] = signal_store.load_bytes(uploaded_file.getvalue())
     return dbs
 
-def create_graph(dbc_data: dict, highlight_common: bool):
-    """Создание интерактивного графа для всех DBC."""
-    net = Network(height="1000px", width="100%")
-    net.set_options(
-        """
-    {
-        "configure": {
-            "enabled": true
-        },
-        "nodes": {
-            "font": {
-                "size": 12
-            }
-        }
-    }
+@profiling.profiled("create_graph")
+def create_graph(dbc_data: dict, highlight_common: bool, lazy: bool = False):
+    """Создание интерактивного графа для всех DBC.
+
+    lazy=True рисует только корни и сообщения, сигналы раскрываются по клику.
     """
-    )
+    net = Network(height="1000px", width="100%")
+    net.set_options(graph_lod.graph_options(lazy))
 
     dbc_msg_names = {}
     for name, db in dbc_data.items():
@@ -49,6 +39,7 @@ def create_graph(dbc_data: dict, highlight_common: bool):
         common_msgs = set()
 
     message_nodes = {}  # {(dbc_name, msg_name): node_id}
+    lod = graph_lod.LodPayload(signal_color="#2DAC4F") if lazy else None
 
     for name, db in dbc_data.items():
         net.add_node(
@@ -68,16 +59,7 @@ def create_graph(dbc_data: dict, highlight_common: bool):
             message_id = f"msg_{message_counter}_{name}"
             message_nodes[(name, message.name)] = message_id
 
-            info = f"""
-            Name message: {message.name}
-            Sender: {message.senders}
-            Recievers: {message.receivers}
-            Send type: {message.send_type}
-            Cycle type: {message.cycle_time}
-            ID: 0x{message.frame_id:X}
-            Length: {message.length} bytes
-            Signals: {len(message.signals)}
-            """
+            info = None if lazy else graph_lod.message_tooltip(message)
 
             net.add_node(
                 message_id,
@@ -90,34 +72,18 @@ def create_graph(dbc_data: dict, highlight_common: bool):
 
             net.add_edge(name, message_id)
 
-            def format_choices(choices):
-                if not choices:
-                    return "None"
-                return "".join([f"0x{int(k):X}: {v} " for k, v in choices.items()])
+            if lazy:
+                signal_ids = []
+                for _ in message.signals:
+                    signal_counter += 1
+                    signal_ids.append(f"sig_{signal_counter}_{name}")
+                lod.add_message(message_id, message, signal_ids)
+                continue
 
             for signal in message.signals:
                 signal_counter += 1
                 signal_id = f"sig_{signal_counter}_{name}"
-                choices_str = format_choices(
-                    signal.choices if hasattr(signal, "choices") else None
-                )
-                info = f"""
-                    Name signal: {signal.name}
-                    Recievers: {signal.receivers}
-                    Byte order: {signal.byte_order}
-                    Cycle type: {message.cycle_time}
-                    Start bit: {signal.start}
-                    Min value: {signal.minimum}
-                    Max value: {signal.maximum}
-                    Signal Value Description: {choices_str}
-                    Initianal value: {signal.raw_initial if signal.raw_initial != None else 0}
-                    Invalid value: {signal.raw_invalid}
-                    Scale: {signal.scale}
-                    Offset: {signal.offset}
-                    Description: {signal.comment}
-                    Lenght: {signal.length} bit
-                    Unit: {signal.unit}
-                    """
+                info = graph_lod.signal_tooltip(message, signal)
 
                 net.add_node(
                     signal_id,
@@ -131,12 +97,23 @@ def create_graph(dbc_data: dict, highlight_common: bool):
                 net.add_edge(message_id, signal_id)
 
     if highlight_common:
+        # Один узел-хаб на общее сообщение: N связей вместо N*(N-1)/2
         for common_msg in common_msgs:
-            nodes = [message_nodes[(dbc_name, common_msg)] for dbc_name in dbc_data.keys()]
-            for node1, node2 in combinations(nodes, 2):
-                net.add_edge(node1, node2, color='red', width=3, title='Common message across DBCs')
+            hub_id = f"common_{common_msg}"
+            net.add_node(
+                hub_id,
+                label=common_msg,
+                level=2,
+                color="red",
+                shape="diamond",
+                title="Common message across DBCs",
+                size=12,
+            )
+            for dbc_name in dbc_data.keys():
+                net.add_edge(hub_id, message_nodes[(dbc_name, common_msg)], color='red', width=3, title='Common message across DBCs')
 
-    html = net.generate_html()
+    with profiling.span("create_graph.html", items=len(net.nodes)):
+        html = net.generate_html()
 
     js_code = """
     <div style="position: absolute; top: 10px; left: 10px; z-index: 1000; background: white; padding: 5px; border-radius: 5px;">
@@ -160,55 +137,64 @@ def create_graph(dbc_data: dict, highlight_common: bool):
     """
 
     html = html.replace("</body>", js_code + "</body>")
-
-    net.save_graph("temp_graph.html")
-    return open("temp_graph.html", "r", encoding="utf-8").read()
+    if lazy:
+        html = lod.inject(html)
+
+    return html
+
+def show_diagnostics(profile: profiling.Profile):
+    """Панель с замерами этапов последнего прогона скрипта."""
+    with st.expander("Диагностика производительности", expanded=True):
+        df = profile.to_frame()
+        if df.empty:
+            st.info("Нет замеров: загрузите DBC-файлы")
+            return
+        top = df[df["depth"] == 0]
+        st.metric("Всего, мс", f"{top['wall_ms'].sum():.1f}")
+        st.dataframe(df)
+        st.bar_chart(df.groupby("stage")["wall_ms"].sum())
+        st.download_button("Скачать JSON", profile.to_json(indent=2), file_name="profile.json", mime="application/json")
 
 def main():
+    diagnostics = st.sidebar.checkbox("Диагностика производительности")
+    if diagnostics:
+        memory = st.sidebar.checkbox("Считать пик памяти", value=True)
+        with profiling.collect(memory=memory) as profile:
+            render()
+        show_diagnostics(profile)
+    else:
+        render()
+
+def render():
     st.title("📡 CAN Network Visualizer")
     uploaded_files = st.file_uploader("Выберите DBC-файлы", type=".dbc", accept_multiple_files=True)
-    cols = st.columns(2)
+    cols = st.columns(3)
     with cols[0]:
         check = st.checkbox("Отобразить граф")
     with cols[1]:
         highlight = st.checkbox("Подсвечивать общие сообщения красными связями", value=True)
+    with cols[2]:
+        lazy = st.checkbox("Раскрывать сигналы по клику", value=True)
     
     dbc_data = {}
     
-    all_msg = []
+    index = None
     all_ecu = []
 
     if uploaded_files:
         try:
             dbc_data = read_dbc(uploaded_files)
             if check:
-                html = create_graph(dbc_data, highlight)
+                html = create_graph(dbc_data, highlight, lazy)
                 st.components.v1.html(html, height=1000, scrolling=True)
 
             st.subheader("Статистика")
             col1, col2 = st.columns(2)
             
-            signals_data = []
-            messages_data = []
-
-            for name, db in dbc_data.items():
-                for msg in db.messages:
-                    messages_data.append({
-                        'Message': msg.name,
-                        'ID': f"0x{msg.frame_id:X}",
-                        'Length': msg.length,
-                        'Signals Count': len(msg.signals)
-                    })
-                    for sig in msg.signals:
-                        signals_data.append({
-                            'Signal': sig.name,
-                            'Message': msg.name,
-                            'Start Bit': sig.start,
-                            'Length': sig.length
-                        })
-            
-            signals_df = pd.DataFrame(signals_data)
-            messages_df = pd.DataFrame(messages_data)
+            with profiling.span("statistics") as span:
+                signals_df = signal_store.signals_table(dbc_data)
+                messages_df = signal_store.messages_table(dbc_data)
+                span.count(len(signals_df))
             
             col1.metric("Сообщений", len(messages_df))
             col1.dataframe(messages_df)
@@ -216,8 +202,9 @@ def main():
             col2.metric("Сигналов", signals_df.shape[0])
             col2.dataframe(signals_df)
             
-            all_msg = tl.getMessages(dbc_data)
-            all_ecu = tl.getEcu(dbc_data)
+            with profiling.span("dbc_index"):
+                index = dbc_index.index_for(dbc_data)
+            all_ecu = index.ecu_names()
 
         except Exception as e:
             st.error(f"Ошибка загрузки файла: {e}")
@@ -234,15 +221,24 @@ def main():
             with cols[0]:
                 msg_name = st.text_input(f"Имя сообщения {i+1}", key=f"msg_name_{i}")
                 if msg_name:
-                    if msg_name in all_msg:
+                    if index is not None and index.has_message(msg_name):
                         st.error(f"Сообщение с именем '{msg_name}' уже существует!")
                         break
+            # Extended читается до проверки ID: от него зависит ключ в индексе
+            with cols[3]:
+                msg_ext = st.checkbox(f"Extended {i+1}", key=f"msg_ext_{i}")
             with cols[1]:
                 msg_id = st.text_input(f"ID {i+1} (hex)", value="0x", key=f"msg_id_{i}")
+                if index is not None and msg_id.strip() not in ("", "0x"):
+                    try:
+                        # Тот же разбор, что и при записи в EditSession
+                        owners = index.files_for_id(tl.parse_message_id(msg_id), is_extended=msg_ext)
+                    except ValueError:
+                        owners = []
+                    if owners:
+                        st.warning(f"ID {msg_id} уже используется: {', '.join(f'{msg} ({file})' for file, msg in owners)}")
             with cols[2]:
                 msg_len = st.number_input(f"Длина {i+1} (байт)", min_value=1, max_value=64, value=8, key=f"msg_len_{i}")
-            with cols[3]:
-                msg_ext = st.checkbox(f"Extended {i+1}", key=f"msg_ext_{i}")
             with cols[4]:
                 msg_comment = st.text_input(f"Комментарий {i+1}", key=f"msg_comment_{i}")
             with cols[5]:
@@ -320,49 +316,51 @@ def main():
             })
         
         if st.form_submit_button("Сохранить локально изменения"):
-            st.success(f"Сохранено {num_messages} сообщений!")
-            st.json(messages)
+            layout_errors = []
+            with profiling.span("layout_check", items=len(messages)):
+                for message in messages:
+                    layout_errors.extend(layout_check.check_signal_rows(message['signals'], message['length']))
+            for error in layout_errors:
+                st.error(error)
+            if not layout_errors:
+                st.success(f"Сохранено {num_messages} сообщений!")
+                st.json(messages)
         
     finish = st.button('Загрузить изменения в файл')
 
     if finish:
-        for message in messages:
-
-            for db_name, db in dbc_data.items():
-                tl.addMessage(
-                    df_dbc=db,
+        try:
+            session = tl.EditSession({name: store.database() for name, store in dbc_data.items()})
+            for message in messages:
+                session.add_message(
                     name=message['name'],
                     message_id=message['id'],
                     length=message['length'],
                     signals=message['signals'],
                     is_extended_frame=message['extended'],
                     comment=message['comment'],
-                    file_path="New_dbc.dbc"
+                    senders=[message['sender']],
                 )
-        st.success("Изменения успешно загружены в файл!")
+            errors = session.validate()
+            if errors:
+                for error in errors:
+                    st.error(error)
+            else:
+                # Индекс из dbc_index.index_for общий для всех сессий и описывает
+                # загруженные файлы, а новые сообщения есть только в New_dbc.*
+                written = session.commit(file_path="New_dbc")
+                st.success(f"Изменения успешно загружены в файлы: {', '.join(written.values())}")
+        except Exception as e:
+            st.error(f"Ошибка записи DBC: {e}")
 
     if dbc_data:
         st.subheader("Таблицы сообщений и сигналов по каждому DBC файлу")
-        for dbc_name, db in dbc_data.items():
+        for dbc_name in dbc_data:
             with st.expander(f"DBC файл: {dbc_name}"):
-                messages_data = []
-                signals_data = []
-                for msg in db.messages:
-                    messages_data.append({
-                        'Message': msg.name,
-                        'ID': f"0x{msg.frame_id:X}",
-                        'Length': msg.length,
-                        'Signals Count': len(msg.signals)
-                    })
-                    for sig in msg.signals:
-                        signals_data.append({
-                            'Signal': sig.name,
-                            'Message': msg.name,
-                            'Start Bit': sig.start,
-                            'Length': sig.length
-                        })
-                messages_df = pd.DataFrame(messages_data)
-                signals_df = pd.DataFrame(signals_data)
+                with profiling.span("file_tables") as span:
+                    messages_df = signal_store.messages_table(dbc_data, dbc_name)
+                    signals_df = signal_store.signals_table(dbc_data, dbc_name)
+                    span.count(len(signals_df))
                 st.markdown("**Сообщения:**")
                 st.dataframe(messages_df)
                 st.markdown("**Сигналы:**")
@@ -2,30 +2,106 @@ import cantools
 from typing import Union, List, Dict
 import cantools.database
 import os
+import re
+import copy
+import tempfile
 from datetime import datetime
+from cantools.database.conversion import BaseConversion
 import pprint
+from concurrent.futures import ProcessPoolExecutor
+import dbc_cache
+import catalog
+import profiling
+import lazy_dbc
+import signal_store
 
-def read_dbc(file_path: Union[str, List]) -> Union[cantools.database.can.database.Database, Dict]:
+def as_dbc_dict(df_dbc, key: str = "", full: bool = False) -> Dict:
+    """Одна база или dict {имя файла: база}, как из read_dbc, -> dict.
+
+    Одиночной считается всё, что не dict: cantools Database, signal_store.SignalStore,
+    lazy_dbc.LazyDbc. LazyDbc разбирается полностью (materialize); full=True нужен
+    там, где требуются объекты cantools целиком (декодирование кадров), — тогда и
+    SignalStore заменяется полной базой.
+    """
+    df_dbc = lazy_dbc.materialize(df_dbc)
+    if not isinstance(df_dbc, dict):
+        df_dbc = {key: df_dbc}
+    if full and any(isinstance(db, signal_store.SignalStore) for db in df_dbc.values()):
+        df_dbc = {
+            name: db.database() if isinstance(db, signal_store.SignalStore) else db
+            for name, db in df_dbc.items()
+        }
+    return df_dbc
+
+def _load_dbc_worker(file: str, cache_dir: str):
+    cache = dbc_cache.DbcCache(max_entries=0, cache_dir=cache_dir)
+    return cache.load_file(file)
+
+def _read_dbc_parallel(file_paths: List, workers: int = None) -> Dict:
+    loaded = {}
+    pending = {}
+    futures = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for file in file_paths:
+            try:
+                with open(file, "rb") as f:
+                    key = dbc_cache.content_hash(f.read())
+            except Exception as e:
+                print(f"Error loading {file}: {e}")
+                continue
+            db = dbc_cache.default_cache.lookup(key)
+            if db is not None:
+                loaded[file] = db
+            elif key in futures:
+                pending[file] = key
+            else:
+                pending[file] = key
+                futures[key] = pool.submit(_load_dbc_worker, file, dbc_cache.default_cache.cache_dir)
+                dbc_cache.default_cache.misses += 1
+
+        for file, key in pending.items():
+            try:
+                db = futures[key].result()
+                dbc_cache.default_cache.store(key, db)
+                loaded[file] = db
+            except Exception as e:
+                print(f"Error loading {file}: {e}")
+
+    return {os.path.basename(file): loaded[file] for file in file_paths if file in loaded}
+
+def read_dbc(file_path: Union[str, List], parallel: bool = False, workers: int = None, lazy: bool = False) -> Union[cantools.database.can.database.Database, Dict]:
+    """lazy=True отдаёт lazy_dbc.LazyDbc: только индекс сообщений, разбор по запросу."""
     try:
-        if isinstance(file_path, str):
-            return cantools.database.load_file(file_path)
-        else:
-            result = {}
-            for file in file_path:
-                try:
-                    key = os.path.basename(file)
-                    db = cantools.database.load_file(file)
-                    result[key] = db
-                except Exception as e:
-                    print(f"Error loading {file}: {e}")
-                    continue
+        with profiling.span("read_dbc") as span:
+            if lazy:
+                if isinstance(file_path, str):
+                    return lazy_dbc.LazyDbc(file_path)
+                return {os.path.basename(file): lazy_dbc.LazyDbc(file) for file in file_path}
+            if isinstance(file_path, str):
+                db = dbc_cache.load_file(file_path)
+                span.count(len(db.messages))
+                return db
+            elif parallel:
+                result = _read_dbc_parallel(list(file_path), workers)
+            else:
+                result = {}
+                for file in file_path:
+                    try:
+                        key = os.path.basename(file)
+                        db = dbc_cache.load_file(file)
+                        result[key] = db
+                    except Exception as e:
+                        print(f"Error loading {file}: {e}")
+                        continue
+            span.count(sum(len(db.messages) for db in result.values()))
             return result
     except Exception as e:
         return f"Error: {e}"
 
 def getEcu(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> List:
     try:
-        if isinstance(df_dbc, cantools.database.can.database.Database):
+        df_dbc = lazy_dbc.materialize(df_dbc)
+        if not isinstance(df_dbc, dict):
             return [node.name for node in df_dbc.nodes]
         else:
             lst = []
@@ -37,7 +113,8 @@ def getEcu(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> List
 
 def getBus(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> List:
     try:
-        if isinstance(df_dbc, cantools.database.can.database.Database):
+        df_dbc = lazy_dbc.materialize(df_dbc)
+        if not isinstance(df_dbc, dict):
             return df_dbc.buses
         else:
             lst = []
@@ -47,57 +124,239 @@ def getBus(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> List
     except Exception as e:    
         return f"Error: {e}"
 
+@profiling.profiled("getMessages")
 def getMessages(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> List:
     try:
-        lst = []
-        if isinstance(df_dbc, cantools.database.can.database.Database):
-            for message in df_dbc.messages:
-                lst.append(message.name)
-            return lst
-        else:
-            for _, value in df_dbc.items():
-                for message in value.messages:
-                    lst.append(message.name)
-            return lst
+        if isinstance(df_dbc, lazy_dbc.LazyDbc):
+            return df_dbc.message_names()
+        if isinstance(df_dbc, dict) and all(isinstance(db, lazy_dbc.LazyDbc) for db in df_dbc.values()):
+            return [name for db in df_dbc.values() for name in db.message_names()]
+        return catalog.catalog_for(df_dbc).messages["message"].tolist()
     except Exception as e:
         return f"Error: {e}"
     
+@profiling.profiled("getSignalsDetailed")
 def getSignalsDetailed(df_dbc: Union[cantools.database.can.database.Database, Dict]) -> Dict:
     try:
-        def signal_to_dict(signal):
-            return {
-                'name': signal.name,
-                'start_bit': signal.start,
-                'length': f"{signal.length} bit",
-                'scale': signal.scale,
-                'offset': signal.offset,
-                'unit': signal.unit,
-                'is_signed': signal.is_signed,
-                'recievers': signal.receivers,
-                'byte order': signal.byte_order,
-                'max': signal.maximum,
-                'min': signal.minimum,
-                'init': signal.raw_initial if signal.raw_initial != None else 0,
-                'invalid': signal.raw_invalid,
-                'description': signal.comment
-            }
-
-        if isinstance(df_dbc, cantools.database.can.database.Database):
-            result = {}
-            for message in df_dbc.messages:
-                result[message.name] = [signal_to_dict(signal) for signal in message.signals]
+        df_dbc = lazy_dbc.materialize(df_dbc)
+        with profiling.span("catalog") as span:
+            cat = catalog.catalog_for(df_dbc)
+            span.count(len(cat.signals))
+
+        def signals_by_message(filename):
+            result = {name: [] for name in cat.messages_for(filename)["message"]}
+            signals = cat.signals_for(filename)
+            records = (
+                signals.drop(columns="file")
+                .rename(columns={"signal": "name"})
+                .astype({"byte order": str})
+                .to_dict("records")
+            )
+            for record in records:
+                record["length"] = f"{record['length']} bit"
+                result[record.pop("message")].append(record)
             return result
+
+        if not isinstance(df_dbc, dict):
+            return signals_by_message("")
         else:
-            result = {}
-            for filename, dbc_data in df_dbc.items():
-                result[filename] = {}
-                for message in dbc_data.messages:
-                    result[filename][message.name] = [signal_to_dict(signal) for signal in message.signals]
-            return result
+            return {filename: signals_by_message(filename) for filename in df_dbc}
             
     except Exception as e:
         return f"Error: {e}"
 
+def parse_message_id(message_id: Union[int, str]) -> int:
+    """ID сообщения из ввода: "0x..." — hex, иначе десятичное; общий разбор для UI и EditSession."""
+    if isinstance(message_id, str):
+        message_id = message_id.strip()
+        if message_id.lower().startswith('0x'):
+            return int(message_id, 16)
+        return int(message_id)
+    return int(message_id)
+
+def _parse_choices(text: str) -> Dict:
+    choices = {}
+    for line in (text or "").splitlines():
+        match = re.match(r"^\s*(0x[0-9a-fA-F]+|\d+)\s*:\s*(.+?)\s*$", line)
+        if match:
+            choices[int(match.group(1), 0)] = match.group(2)
+    return choices
+
+def signal_from_dict(signal: Union[Dict, cantools.database.can.Signal]) -> cantools.database.can.Signal:
+    """Сигнал cantools из словаря формы Streamlit / getSignalsDetailed."""
+    if isinstance(signal, cantools.database.can.Signal):
+        return signal
+    length = signal['length']
+    if isinstance(length, str):
+        length = int(length.split()[0])
+    description = signal.get('description')
+    choices = _parse_choices(description) if isinstance(description, str) else {}
+    return cantools.database.can.Signal(
+        name=signal['name'],
+        start=signal['start_bit'],
+        length=length,
+        byte_order=signal.get('byte_order', signal.get('byte order', 'little_endian')),
+        is_signed=signal.get('is_signed', False),
+        raw_initial=signal.get('init'),
+        raw_invalid=signal.get('invalid'),
+        conversion=BaseConversion.factory(
+            scale=signal.get('scale', 1),
+            offset=signal.get('offset', 0),
+            choices=choices or None,
+        ),
+        minimum=signal.get('min'),
+        maximum=signal.get('max'),
+        unit=signal.get('unit') or None,
+        comment=None if choices else description,
+        receivers=list(signal.get('recievers') or []),
+    )
+
+class EditSession:
+    """Пакетное редактирование DBC: изменения копятся в памяти и пишутся при commit.
+
+    Каждый изменённый DBC сериализуется ровно один раз, атомарно (временный
+    файл + os.replace). Исходные объекты Database не изменяются — они могут
+    быть общими через dbc_cache.
+    """
+
+    def __init__(self, df_dbc: Union[cantools.database.can.database.Database, Dict]):
+        self.single = not isinstance(df_dbc, dict)
+        self.databases = dict(as_dbc_dict(df_dbc, key=None, full=True))
+        self.added = {key: [] for key in self.databases}
+        self.changed = {key: [] for key in self.databases}
+
+    def _targets(self, targets):
+        if targets is None:
+            return list(self.databases)
+        targets = [targets] if isinstance(targets, str) else list(targets)
+        # Проверка до постановки в очередь, чтобы сессия не осталась изменённой наполовину
+        unknown = [target for target in targets if target not in self.databases]
+        if unknown:
+            raise ValueError(f"Unknown target DBC: {', '.join(map(str, unknown))}; available: {', '.join(map(str, self.databases))}")
+        return targets
+
+    def add_message(self,
+                    name: str,
+                    message_id: Union[int, str],
+                    length: int,
+                    signals: list = None,
+                    is_extended_frame: bool = False,
+                    comment: str = None,
+                    senders: list = None,
+                    cycle_time: int = None,
+                    targets: Union[str, List] = None):
+        spec = {
+            'name': name,
+            # ID разбирается в validate(): ошибка ввода попадает в список ошибок
+            'message_id': message_id,
+            'length': length,
+            'signals': list(signals or []),
+            'is_extended_frame': is_extended_frame,
+            'comment': comment,
+            'senders': [sender for sender in (senders or []) if sender],
+            'cycle_time': cycle_time,
+        }
+        for key in self._targets(targets):
+            self.added[key].append(spec)
+        return self
+
+    def change_message(self, name: str, targets: Union[str, List] = None, **attributes):
+        for key in self._targets(targets):
+            self.changed[key].append((name, attributes))
+        return self
+
+    def _build(self, spec: Dict) -> cantools.database.can.Message:
+        return cantools.database.can.Message(
+            frame_id=parse_message_id(spec['message_id']),
+            name=spec['name'],
+            length=spec['length'],
+            signals=[signal_from_dict(signal) for signal in spec['signals']],
+            is_extended_frame=spec['is_extended_frame'],
+            is_fd=spec['length'] > 8,
+            comment=spec['comment'],
+            senders=spec['senders'],
+            cycle_time=spec['cycle_time'],
+        )
+
+    def validate(self) -> List[str]:
+        errors = []
+        for key, db in self.databases.items():
+            prefix = f"{key}: " if key else ""
+            names = {message.name for message in db.messages}
+            ids = {(message.frame_id, message.is_extended_frame) for message in db.messages}
+            for name, _ in self.changed[key]:
+                if name not in names:
+                    errors.append(f"{prefix}message {name} not found")
+            for spec in self.added[key]:
+                if not spec['name']:
+                    errors.append(f"{prefix}message without name")
+                    continue
+                if spec['name'] in names:
+                    errors.append(f"{prefix}message {spec['name']} already exists")
+                names.add(spec['name'])
+                try:
+                    frame_id = parse_message_id(spec['message_id'])
+                except (TypeError, ValueError):
+                    errors.append(f"{prefix}{spec['name']}: invalid message ID {spec['message_id']!r}")
+                    continue
+                if (frame_id, spec['is_extended_frame']) in ids:
+                    errors.append(f"{prefix}frame ID 0x{frame_id:X} of {spec['name']} already used")
+                ids.add((frame_id, spec['is_extended_frame']))
+                try:
+                    self._build(spec)
+                except Exception as e:
+                    errors.append(f"{prefix}{spec['name']}: {e}")
+        return errors
+
+    @property
+    def modified(self) -> List:
+        return [key for key in self.databases if self.added[key] or self.changed[key]]
+
+    @profiling.profiled("EditSession.commit")
+    def commit(self, file_path: str = 'New_file') -> Dict:
+        """Проверка и запись изменённых DBC. Возвращает {ключ: путь к файлу}.
+
+        После commit self.databases содержит обновлённые копии баз.
+        """
+        errors = self.validate()
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        written = {}
+        for key in self.modified:
+            db = copy.deepcopy(self.databases[key])
+            for name, attributes in self.changed[key]:
+                message = db.get_message_by_name(name)
+                for attribute, value in attributes.items():
+                    setattr(message, attribute, value)
+            for spec in self.added[key]:
+                db.messages.append(self._build(spec))
+            db.refresh()
+
+            if key is None:
+                path = f"{file_path}.bak_{stamp}.dbc"
+            else:
+                path = f"{file_path}.{os.path.splitext(key)[0]}.bak_{stamp}.dbc"
+            tmp_dir = os.path.dirname(os.path.abspath(path))
+            fd, tmp_path = tempfile.mkstemp(suffix=".dbc", dir=tmp_dir)
+            os.close(fd)
+            try:
+                with profiling.span("dump_file", items=len(db.messages)):
+                    cantools.database.dump_file(db, tmp_path)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self.databases[key] = db
+            self.added[key] = []
+            self.changed[key] = []
+            written[key] = path
+        return written
+
+    def result(self) -> Union[cantools.database.can.database.Database, Dict]:
+        return self.databases[None] if self.single else self.databases
+
 def addMessage(df_dbc: cantools.database.can.database.Database, 
                name: str, 
                message_id: int, 
@@ -107,31 +366,17 @@ def addMessage(df_dbc: cantools.database.can.database.Database,
                comment: str = None,
                file_path: str = 'New_file'):
     try:
-        if isinstance(message_id, str):
-            if message_id.startswith('0x'):
-                message_id_int = int(message_id, 16)
-            else:
-                message_id_int = int(message_id)
-        else:
-            message_id_int = message_id
-        
-        message = cantools.database.can.Message(
-            frame_id=message_id_int,
+        session = EditSession(df_dbc)
+        session.add_message(
             name=name,
+            message_id=message_id,
             length=length,
-            signals=signals if signals else [],
+            signals=signals,
             is_extended_frame=is_extended_frame,
-            comment=comment
+            comment=comment,
         )
-        if isinstance(df_dbc, cantools.database.can.database.Database):
-            df_dbc.messages.append(message)
-        
-        if isinstance(df_dbc, Dict):
-            for key in  df_dbc.keys():
-                df_dbc[key].messages.append(message)
-        
-        cantools.database.dump_file(df_dbc, f"{file_path}.bak_{datetime.now().strftime('%Y%m%d_%H%M%S')}.dbc")
-        return df_dbc
+        session.commit(file_path)
+        return session.result()
         
     except Exception as e:
         print(f"Error: {e}")